@@ -0,0 +1,200 @@
+"""Headless HTTP API for the profiler.
+
+Runs the same pipeline as the Streamlit app behind a small JSON service so
+other systems (the CRM, enrichment scripts) can request profiles:
+
+    python api.py --port 8080 --workers 8
+
+    POST /profiles        {"query": "Jane Doe", "url": "https://...", "wait": 30}
+                          200 with the finished job if it completes within
+                          "wait" seconds (default 0), otherwise 202 with the
+                          job to poll; 429 when the queue is full
+    GET  /jobs/<id>       job status, and the profile once done
+    GET  /healthz         queue depth
+    GET  /metrics         Prometheus metrics
+
+Identical queries that are running or finished within the result TTL share a
+single job. Set PROFILER_API_KEY to require a matching X-API-Key header.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import argparse
+import hmac
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+from utils.scraper import WebScraper
+from utils.http_cache import HttpCache
+from utils.searcher import TavilySearcher
+from utils.extractor import ProfileExtractor, PROMPT_VERSION, parse_section_models
+from utils.extraction_cache import ExtractionCache
+from utils.pipeline import ProfilePipeline
+from utils.profile_store import ProfileStore
+from utils.fanout import FanOutScraper
+from utils.jobs import JobManager, QueueFullError
+from utils import metrics
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_WAIT_SECONDS = 120
+
+
+class ProfilerServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, jobs: JobManager, api_key: Optional[str] = None):
+        super().__init__(address, ProfilerHandler)
+        self.jobs = jobs
+        self.api_key = api_key
+
+
+class ProfilerHandler(BaseHTTPRequestHandler):
+    server: ProfilerServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        # The request body may not have been read; closing keeps it from being parsed as the next request
+        self._send_json(status, {'error': message}, {**(headers or {}), 'Connection': 'close'})
+
+    def _authorized(self) -> bool:
+        if not self.server.api_key:
+            return True
+        return hmac.compare_digest(self.headers.get('X-API-Key', ''), self.server.api_key)
+
+    def _read_json(self) -> Dict[str, Any]:
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise ValueError("invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        return body
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        if path == '/healthz':
+            self._send_json(200, {'status': 'ok', 'pending': self.server.jobs.pending})
+            return
+        if not self._authorized():
+            self._error(401, "invalid or missing API key")
+            return
+
+        if path == '/metrics':
+            data = metrics.REGISTRY.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif path.startswith('/jobs/'):
+            job = self.server.jobs.get(path[len('/jobs/'):])
+            if job is None:
+                self._error(404, "unknown job")
+            else:
+                self._send_json(200, job.to_dict())
+        else:
+            self._error(404, "not found")
+
+    def do_POST(self):
+        if not self._authorized():
+            self._error(401, "invalid or missing API key")
+            return
+        if urlsplit(self.path).path.rstrip('/') != '/profiles':
+            self._error(404, "not found")
+            return
+
+        try:
+            body = self._read_json()
+            for field in ('query', 'url'):
+                if body.get(field) is not None and not isinstance(body[field], str):
+                    raise ValueError(f"'{field}' must be a string")
+            url = (body.get('url') or '').strip() or None
+            query = (body.get('query') or '').strip() or url
+            if not query:
+                raise ValueError("'query' or 'url' is required")
+            wait = min(float(body.get('wait') or 0), MAX_WAIT_SECONDS)
+        except (ValueError, TypeError) as e:
+            self._error(400, str(e))
+            return
+
+        try:
+            job = self.server.jobs.submit(query, url)
+        except QueueFullError as e:
+            self._error(429, str(e), {'Retry-After': '5'})
+            return
+
+        if wait > 0:
+            job.wait(wait)
+        if job.done:
+            self._send_json(200, job.to_dict())
+        else:
+            self._send_json(202, job.to_dict(), {'Location': f"/jobs/{job.id}"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP API for profile lookups.")
+    parser.add_argument('--host', default=os.getenv('PROFILER_API_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PROFILER_API_PORT', '8080')))
+    parser.add_argument('--workers', type=int, default=4, help="Lookups processed concurrently")
+    parser.add_argument('--max-pending', type=int, default=100,
+                        help="Queued or running lookups before new ones are refused with 429")
+    parser.add_argument('--result-ttl', type=float, default=3600, help="Seconds finished lookups are reused")
+    parser.add_argument('--fanout', type=int, default=0, metavar='N',
+                        help="Also scrape the top N search result URLs and linked social profiles")
+    parser.add_argument('--section-models', metavar='SPEC',
+                        help="Per-section model routing, e.g. identity=gpt-4o-mini,events=gpt-4o-mini")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    load_dotenv()
+
+    cache_dir = os.getenv('PROFILER_CACHE_DIR', '.cache')
+    scraper = WebScraper(cache=HttpCache(os.path.join(cache_dir, 'http.sqlite3')))
+    searcher = TavilySearcher(api_key=os.getenv('TAVILY_API_KEY'))
+    extractor = ProfileExtractor(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        cache=ExtractionCache(os.path.join(cache_dir, 'extractions.sqlite3'), PROMPT_VERSION),
+        section_models=parse_section_models(args.section_models)
+    )
+    fanout = FanOutScraper(scraper, max_concurrency=args.workers * 2) if args.fanout else None
+    pipeline = ProfilePipeline(scraper, searcher, extractor, max_workers=args.workers * 2,
+                               fanout=fanout, fanout_top_n=args.fanout,
+                               store=ProfileStore(os.path.join(cache_dir, 'profiles.sqlite3')))
+    jobs = JobManager(pipeline, max_workers=args.workers, result_ttl=args.result_ttl,
+                      max_pending=args.max_pending, stream=False)
+
+    server = ProfilerServer((args.host, args.port), jobs, api_key=os.getenv('PROFILER_API_KEY'))
+    logging.info(f"Profiler API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.close()
+        pipeline.close()
+
+
+if __name__ == '__main__':
+    main()
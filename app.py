@@ -5,9 +5,14 @@ st.set_page_config(page_title="Personal Prospect Profiler", layout="wide")
 import os
 from dotenv import load_dotenv
 from utils.scraper import WebScraper
+from utils.http_cache import HttpCache
 from utils.searcher import TavilySearcher
-from utils.extractor import ProfileExtractor
-import validators
+from utils.extractor import ProfileExtractor, PROMPT_VERSION, parse_section_models
+from utils.extraction_cache import ExtractionCache
+from utils.pipeline import ProfilePipeline
+from utils.profile_store import ProfileStore
+from utils.fanout import FanOutScraper
+from utils.jobs import JobManager
 
 # Load environment variables
 load_dotenv()
@@ -15,207 +20,255 @@ load_dotenv()
 # Initialize
 @st.cache_resource
 def init_clients():
-    scraper = WebScraper()
+    cache_dir = os.getenv('PROFILER_CACHE_DIR', '.cache')
+    scraper = WebScraper(cache=HttpCache(os.path.join(cache_dir, 'http.sqlite3')))
     searcher = TavilySearcher(api_key=os.getenv('TAVILY_API_KEY'))
-    extractor = ProfileExtractor(api_key=os.getenv('OPENAI_API_KEY'))
-    return scraper, searcher, extractor
+    extractor = ProfileExtractor(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        cache=ExtractionCache(os.path.join(cache_dir, 'extractions.sqlite3'), PROMPT_VERSION),
+        # Route simple sections to a cheaper model: PROFILER_SECTION_MODELS=identity=gpt-4o-mini,events=gpt-4o-mini
+        section_models=parse_section_models(os.getenv('PROFILER_SECTION_MODELS'))
+    )
+    # Fetching the top search results directly is opt-in: PROFILER_FANOUT_TOP_N=3
+    fanout_top_n = int(os.getenv('PROFILER_FANOUT_TOP_N', '0'))
+    pipeline = ProfilePipeline(
+        scraper, searcher, extractor,
+        max_workers=int(os.getenv('PROFILER_MAX_WORKERS', '8')),
+        fanout=FanOutScraper(scraper) if fanout_top_n else None,
+        fanout_top_n=fanout_top_n,
+        store=ProfileStore(os.path.join(cache_dir, 'profiles.sqlite3'))
+    )
+    return scraper, searcher, extractor, pipeline
 
-scraper, searcher, extractor = init_clients()
+scraper, searcher, extractor, pipeline = init_clients()
+
+@st.cache_resource
+def init_jobs():
+    # Shared by every session: lookups run off the script thread and finished ones are reused on reruns
+    return JobManager(
+        pipeline,
+        max_workers=int(os.getenv('PROFILER_JOB_WORKERS', '4')),
+        result_ttl=float(os.getenv('PROFILER_RESULT_TTL', '3600'))
+    )
+
+jobs = init_jobs()
+
+def render_profile(profile):
+    """Render a (possibly partial) profile into the current container."""
+    # Display results in an organized layout
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.header("Personal Overview")
+        if profile.full_name:
+            st.subheader(profile.full_name)
+        if profile.professional_headline:
+            st.write("**Professional Headline:**", profile.professional_headline)
+        if profile.current_role:
+            st.write("**Current Role:**", profile.current_role)
+        if profile.company:
+            st.write("**Company:**", profile.company)
+        if profile.location:
+            st.write("**Location:**", profile.location)
+
+        if profile.skills:
+            st.markdown("### Skills & Expertise")
+            for skill in profile.skills:
+                st.write(f"- {skill}")
+
+        if profile.work_experience:
+            st.markdown("### Work Experience")
+            for exp in profile.work_experience:
+                with st.expander(f"{exp.title or 'Role'} at {exp.company or 'Company'}"):
+                    if exp.duration:
+                        st.write(f"**Duration:** {exp.duration}")
+                    if exp.description:
+                        st.write(exp.description)
+
+        if profile.education:
+            st.markdown("### Education")
+            for edu in profile.education:
+                st.write(f"- **{edu.degree or 'Degree'}** from {edu.institution or 'Institution'}")
+                if edu.year:
+                    st.write(f"  Year: {edu.year}")
+
+    with col2:
+        if profile.social_profiles:
+            st.markdown("### Online Presence")
+            for platform, link in profile.social_profiles.items():
+                st.write(f"- [{platform.title()}]({link})")
+
+        if profile.websites:
+            st.markdown("### Websites")
+            for website in profile.websites:
+                st.write(f"- {website}")
+
+        if profile.publications:
+            st.markdown("### Publications")
+            for pub in profile.publications:
+                with st.expander(pub.title or "Publication"):
+                    if pub.year:
+                        st.write(f"**Year:** {pub.year}")
+                    if pub.description:
+                        st.write(pub.description)
+
+        if profile.speaking_engagements:
+            st.markdown("### Speaking Engagements")
+            for event in profile.speaking_engagements:
+                with st.expander(event.title or "Event"):
+                    if event.date:
+                        st.write(f"**Date:** {event.date}")
+                    if event.description:
+                        st.write(event.description)
+
+    # Events Section
+    st.markdown("---")
+    st.header("Events & Activities")
+
+    # Recent Events
+    if profile.recent_events:
+        st.subheader("Recent Events")
+        for event in profile.recent_events:
+            with st.expander(f"{event.date or 'Recent'} - {event.title or 'Untitled Event'}"):
+                if event.description:
+                    st.write(event.description)
+                if event.related_people:
+                    st.write("**Related People:**", ", ".join(event.related_people))
+                if event.related_organizations:
+                    st.write("**Organizations:**", ", ".join(event.related_organizations))
+                if event.url:
+                    st.write(f"[More Information]({event.url})")
+
+    # Key Events
+    if profile.key_events:
+        st.subheader("Key Events")
+        for event in profile.key_events:
+            with st.expander(f"{event.date or 'Date Unknown'} - {event.title or 'Untitled Event'}"):
+                if event.description:
+                    st.write(event.description)
+                if event.importance:
+                    st.write(f"**Significance:** {event.importance}")
+                if event.related_people:
+                    st.write("**Related People:**", ", ".join(event.related_people))
+                if event.related_organizations:
+                    st.write("**Organizations:**", ", ".join(event.related_organizations))
+                if event.url:
+                    st.write(f"[More Information]({event.url})")
+
+    # Upcoming Events
+    if profile.upcoming_events:
+        st.subheader("Upcoming Events")
+        for event in profile.upcoming_events:
+            with st.expander(f"{event.date or 'Upcoming'} - {event.title or 'Untitled Event'}"):
+                if event.description:
+                    st.write(event.description)
+                if event.event_type:
+                    st.write(f"**Type:** {event.event_type}")
+                if event.related_people:
+                    st.write("**Related People:**", ", ".join(event.related_people))
+                if event.related_organizations:
+                    st.write("**Organizations:**", ", ".join(event.related_organizations))
+                if event.url:
+                    st.write(f"[More Information]({event.url})")
+
+    # Additional Information
+    if profile.key_topics:
+        st.markdown("### Key Topics & Focus Areas")
+        for topic in profile.key_topics:
+            st.write(f"- {topic}")
+
+    if profile.achievements:
+        st.markdown("### Achievements & Recognition")
+        for achievement in profile.achievements:
+            st.write(f"- {achievement}")
+
+    if profile.certifications:
+        st.markdown("### Certifications")
+        for cert in profile.certifications:
+            st.write(f"- {cert}")
+
+    if profile.interesting_facts:
+        st.markdown("### Interesting Facts")
+        for fact in profile.interesting_facts:
+            st.write(f"- {fact}")
+
+    if profile.collaborations:
+        st.markdown("### Notable Collaborations")
+        for collab in profile.collaborations:
+            st.write(f"- {collab}")
+
+    # Sources and Last Update
+    if profile.data_sources:
+        st.markdown("---")
+        st.markdown("### Data Sources")
+        for source in profile.data_sources:
+            st.write(f"- {source}")
+
+    if profile.last_updated or profile.last_known_activity_date:
+        st.markdown("### Profile Information")
+        if profile.last_known_activity_date:
+            st.write(f"Last Known Activity: {profile.last_known_activity_date}")
+        if profile.last_updated:
+            st.write(f"Profile Last Updated: {profile.last_updated}")
+
+
+def render_debug(query_trace, wall_time: float):
+    """Show where time, tokens and cache hits went for the current query."""
+    with st.expander("Debug: pipeline breakdown", expanded=True):
+        st.write(f"**Wall time:** {wall_time:.2f}s")
+        totals = query_trace.stage_totals()
+        if totals:
+            st.markdown("**Time per stage (s, summed across parallel work)**")
+            st.bar_chart(totals)
+        if query_trace.spans:
+            st.markdown("**Spans**")
+            st.dataframe(query_trace.spans, use_container_width=True)
+        if query_trace.counters:
+            st.markdown("**Tokens, cost, bytes and cache results**")
+            st.json(query_trace.counters)
 
 # Page title
 st.title("Personal Prospect Profiler")
 
 # Input
 query = st.text_input("Enter person's name or profile URL:", "")
+show_debug = st.sidebar.checkbox("Show debug metrics")
 
-if query:
-    try:
-        with st.spinner("Gathering information..."):
-            data_sources = []
-            
-            # If it's a URL, scrape it first
-            if validators.url(query):
-                scraped_data = scraper.scrape_website(query)
-                data_sources.append({
-                    'content': scraped_data['text_content'],
-                    'urls': [query]
-                })
-            
-            # Perform Tavily search
-            search_data = searcher.search(query)
-            if search_data['content']:
-                data_sources.append(search_data)
-            
-            # Extract profiles from each data source
-            profiles = []
-            for source in data_sources:
-                if source['content']:
-                    profile = extractor.extract_profile(source, query)
-                    profiles.append(profile)
-            
-            # Merge profiles
-            profile = extractor.merge_profiles(profiles)
-            
-            # Display results in an organized layout
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.header("Personal Overview")
-                if profile.full_name:
-                    st.subheader(profile.full_name)
-                if profile.professional_headline:
-                    st.write("**Professional Headline:**", profile.professional_headline)
-                if profile.current_role:
-                    st.write("**Current Role:**", profile.current_role)
-                if profile.company:
-                    st.write("**Company:**", profile.company)
-                if profile.location:
-                    st.write("**Location:**", profile.location)
-                
-                if profile.skills:
-                    st.markdown("### Skills & Expertise")
-                    for skill in profile.skills:
-                        st.write(f"- {skill}")
-                
-                if profile.work_experience:
-                    st.markdown("### Work Experience")
-                    for exp in profile.work_experience:
-                        with st.expander(f"{exp.title or 'Role'} at {exp.company or 'Company'}"):
-                            if exp.duration:
-                                st.write(f"**Duration:** {exp.duration}")
-                            if exp.description:
-                                st.write(exp.description)
-                
-                if profile.education:
-                    st.markdown("### Education")
-                    for edu in profile.education:
-                        st.write(f"- **{edu.degree or 'Degree'}** from {edu.institution or 'Institution'}")
-                        if edu.year:
-                            st.write(f"  Year: {edu.year}")
-            
-            with col2:
-                if profile.social_profiles:
-                    st.markdown("### Online Presence")
-                    for platform, link in profile.social_profiles.items():
-                        st.write(f"- [{platform.title()}]({link})")
-                
-                if profile.websites:
-                    st.markdown("### Websites")
-                    for website in profile.websites:
-                        st.write(f"- {website}")
-                
-                if profile.publications:
-                    st.markdown("### Publications")
-                    for pub in profile.publications:
-                        with st.expander(pub.title or "Publication"):
-                            if pub.year:
-                                st.write(f"**Year:** {pub.year}")
-                            if pub.description:
-                                st.write(pub.description)
-                
-                if profile.speaking_engagements:
-                    st.markdown("### Speaking Engagements")
-                    for event in profile.speaking_engagements:
-                        with st.expander(event.title or "Event"):
-                            if event.date:
-                                st.write(f"**Date:** {event.date}")
-                            if event.description:
-                                st.write(event.description)
-            
-            # Events Section
-            st.markdown("---")
-            st.header("Events & Activities")
-            
-            # Recent Events
-            if profile.recent_events:
-                st.subheader("Recent Events")
-                for event in profile.recent_events:
-                    with st.expander(f"{event.date or 'Recent'} - {event.title or 'Untitled Event'}"):
-                        if event.description:
-                            st.write(event.description)
-                        if event.related_people:
-                            st.write("**Related People:**", ", ".join(event.related_people))
-                        if event.related_organizations:
-                            st.write("**Organizations:**", ", ".join(event.related_organizations))
-                        if event.url:
-                            st.write(f"[More Information]({event.url})")
-
-            # Key Events
-            if profile.key_events:
-                st.subheader("Key Events")
-                for event in profile.key_events:
-                    with st.expander(f"{event.date or 'Date Unknown'} - {event.title or 'Untitled Event'}"):
-                        if event.description:
-                            st.write(event.description)
-                        if event.importance:
-                            st.write(f"**Significance:** {event.importance}")
-                        if event.related_people:
-                            st.write("**Related People:**", ", ".join(event.related_people))
-                        if event.related_organizations:
-                            st.write("**Organizations:**", ", ".join(event.related_organizations))
-                        if event.url:
-                            st.write(f"[More Information]({event.url})")
-
-            # Upcoming Events
-            if profile.upcoming_events:
-                st.subheader("Upcoming Events")
-                for event in profile.upcoming_events:
-                    with st.expander(f"{event.date or 'Upcoming'} - {event.title or 'Untitled Event'}"):
-                        if event.description:
-                            st.write(event.description)
-                        if event.event_type:
-                            st.write(f"**Type:** {event.event_type}")
-                        if event.related_people:
-                            st.write("**Related People:**", ", ".join(event.related_people))
-                        if event.related_organizations:
-                            st.write("**Organizations:**", ", ".join(event.related_organizations))
-                        if event.url:
-                            st.write(f"[More Information]({event.url})")
-            
-            # Additional Information
-            if profile.key_topics:
-                st.markdown("### Key Topics & Focus Areas")
-                for topic in profile.key_topics:
-                    st.write(f"- {topic}")
-            
-            if profile.achievements:
-                st.markdown("### Achievements & Recognition")
-                for achievement in profile.achievements:
-                    st.write(f"- {achievement}")
-            
-            if profile.certifications:
-                st.markdown("### Certifications")
-                for cert in profile.certifications:
-                    st.write(f"- {cert}")
-            
-            if profile.interesting_facts:
-                st.markdown("### Interesting Facts")
-                for fact in profile.interesting_facts:
-                    st.write(f"- {fact}")
-            
-            if profile.collaborations:
-                st.markdown("### Notable Collaborations")
-                for collab in profile.collaborations:
-                    st.write(f"- {collab}")
-
-            # Sources and Last Update
-            if profile.data_sources:
-                st.markdown("---")
-                st.markdown("### Data Sources")
-                for source in profile.data_sources:
-                    st.write(f"- {source}")
-
-            if profile.last_updated or profile.last_known_activity_date:
-                st.markdown("### Profile Information")
-                if profile.last_known_activity_date:
-                    st.write(f"Last Known Activity: {profile.last_known_activity_date}")
-                if profile.last_updated:
-                    st.write(f"Profile Last Updated: {profile.last_updated}")
-                    
-    except Exception as e:
-        st.error(f"An error occurred: {str(e)}")
+def render_job(job_id: str, show_debug: bool, polling: bool):
+    """Draw the job's latest snapshot; runs as a fragment that re-polls while the job is running."""
+    job = jobs.get(job_id)
+    if job is None:
+        return
+    if not job.done:
+        st.info("Gathering information...")
+    elif job.error:
+        st.error(f"An error occurred: {job.error}")
         st.error("Please make sure you have set up both OPENAI_API_KEY and TAVILY_API_KEY in your .env file")
-        
+        if st.button("Retry"):
+            st.session_state.job_id = jobs.submit(job.query, job.url).id
+            st.rerun()
+
+    # Sections fill in as sources complete and fields stream from the model
+    if job.profile is not None:
+        render_profile(job.profile)
+
+    if job.done:
+        if show_debug and job.trace is not None:
+            render_debug(job.trace, job.elapsed)
+        if polling:
+            # Redraw the page once so the fragment stops polling
+            st.rerun()
+
+if query:
+    # Reruns only submit when the query changes; identical lookups share one job
+    job = jobs.get(st.session_state.get('job_id')) if st.session_state.get('query') == query else None
+    if job is None:
+        st.session_state.query = query
+        job = jobs.submit(query)
+        st.session_state.job_id = job.id
+    polling = not job.done
+    st.fragment(render_job, run_every=0.5 if polling else None)(job.id, show_debug, polling)
+
 st.markdown("---")
 st.markdown("### How to use")
 st.write("""
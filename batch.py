@@ -0,0 +1,164 @@
+"""Headless batch runner.
+
+Reads prospects from a CSV or JSONL file and writes one merged PersonProfile
+JSON object per line as each finishes. Completed rows are recorded in a
+checkpoint file so an interrupted run resumes where it stopped:
+
+    python batch.py leads.csv -o profiles.jsonl --workers 8
+
+Profiles are also kept in the profile store under PROFILER_CACHE_DIR, so a
+later run over the same prospects (into a new output file) only re-extracts
+sources whose content changed since the last one.
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, Optional, Set
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+from utils.scraper import WebScraper
+from utils.http_cache import HttpCache
+from utils.searcher import TavilySearcher
+from utils.extractor import ProfileExtractor, PROMPT_VERSION, parse_section_models
+from utils.extraction_cache import ExtractionCache
+from utils.pipeline import ProfilePipeline
+from utils.profile_store import ProfileStore
+from utils.fanout import FanOutScraper
+from utils import metrics, ratelimit
+
+
+def read_rows(path: str, name_field: str = 'name', url_field: str = 'url') -> Iterator[Dict[str, Optional[str]]]:
+    """Yield ``{'name', 'url'}`` rows from a CSV or JSONL file."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+
+        for record in records:
+            name = (record.get(name_field) or '').strip()
+            url = (record.get(url_field) or '').strip()
+            if name or url:
+                yield {'name': name or url, 'url': url or None}
+
+
+def row_key(row: Dict[str, Optional[str]]) -> str:
+    """Stable identity for a row, independent of its position in the file."""
+    raw = f"{row['name'].lower()}|{(row['url'] or '').lower()}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def run_batch(pipeline: ProfilePipeline, input_path: str, output_path: str,
+              checkpoint_path: str, workers: int = 4,
+              name_field: str = 'name', url_field: str = 'url') -> Dict[str, int]:
+    done = load_checkpoint(checkpoint_path)
+    stats = {'completed': 0, 'skipped': 0, 'failed': 0}
+
+    rows = read_rows(input_path, name_field, url_field)
+    with open(output_path, 'a', encoding='utf-8') as out, \
+            open(checkpoint_path, 'a', encoding='utf-8') as checkpoint, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+        in_flight = {}
+        exhausted = False
+
+        while in_flight or not exhausted:
+            # Keep a bounded window of rows in flight so huge files stay flat in memory
+            while not exhausted and len(in_flight) < workers * 2:
+                row = next(rows, None)
+                if row is None:
+                    exhausted = True
+                    break
+                key = row_key(row)
+                if key in done:
+                    stats['skipped'] += 1
+                    continue
+                done.add(key)
+                in_flight[metrics.submit(executor, pipeline.run, row['name'], row['url'])] = (key, row)
+
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key, row = in_flight.pop(future)
+                try:
+                    profile = future.result()
+                except Exception as e:
+                    # Not checkpointed, so the row is retried on the next run
+                    logging.error(f"Error profiling {row['name']}: {str(e)}")
+                    stats['failed'] += 1
+                    continue
+
+                # Output is flushed before the checkpoint, so a crash can at worst repeat a row
+                out.write(profile.model_dump_json() + '\n')
+                out.flush()
+                checkpoint.write(key + '\n')
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+                stats['completed'] += 1
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile prospects in bulk from a CSV or JSONL file.")
+    parser.add_argument('input', help="CSV or JSONL file with name and/or url columns")
+    parser.add_argument('-o', '--output', required=True, help="JSONL file to append profiles to")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument('--workers', type=int, default=4, help="Prospects processed concurrently")
+    parser.add_argument('--fanout', type=int, default=0, metavar='N',
+                        help="Also scrape the top N search result URLs and linked social profiles")
+    parser.add_argument('--section-models', metavar='SPEC',
+                        help="Per-section model routing, e.g. identity=gpt-4o-mini,events=gpt-4o-mini")
+    parser.add_argument('--metrics-out', help="Write run metrics here (.prom for Prometheus text, otherwise JSON)")
+    parser.add_argument('--name-field', default='name')
+    parser.add_argument('--url-field', default='url')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    load_dotenv()
+
+    cache_dir = os.getenv('PROFILER_CACHE_DIR', '.cache')
+    scraper = WebScraper(cache=HttpCache(os.path.join(cache_dir, 'http.sqlite3')))
+    searcher = TavilySearcher(api_key=os.getenv('TAVILY_API_KEY'))
+    extractor = ProfileExtractor(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        cache=ExtractionCache(os.path.join(cache_dir, 'extractions.sqlite3'), PROMPT_VERSION),
+        section_models=parse_section_models(args.section_models)
+    )
+
+    fanout = FanOutScraper(scraper, max_concurrency=args.workers * 2) if args.fanout else None
+
+    store = ProfileStore(os.path.join(cache_dir, 'profiles.sqlite3'))
+
+    with ProfilePipeline(scraper, searcher, extractor, max_workers=args.workers * 2,
+                         fanout=fanout, fanout_top_n=args.fanout, store=store) as pipeline, \
+            ratelimit.priority(ratelimit.BATCH):
+        # API calls share process-wide limits and yield to interactive lookups
+        stats = run_batch(
+            pipeline, args.input, args.output,
+            args.checkpoint or f"{args.output}.checkpoint",
+            workers=args.workers,
+            name_field=args.name_field,
+            url_field=args.url_field,
+        )
+
+    logging.info(f"Batch finished: {stats['completed']} completed, "
+                 f"{stats['skipped']} already done, {stats['failed']} failed")
+    if args.metrics_out:
+        metrics.REGISTRY.write(args.metrics_out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""Local stand-ins for the services the profiler talks to.
+
+``FakeServer`` runs a threaded HTTP server that plays two roles:
+
+* ``/page/<n>`` serves a generated profile page, for ``WebScraper``.
+* ``/v1/chat/completions`` is an OpenAI-compatible endpoint. It answers tool
+  calls with a synthetic object generated from the requested JSON schema,
+  both as a single response and as a server-sent event stream. Point the
+  ``OpenAI`` client at it through ``OPENAI_BASE_URL``.
+
+``FakeTavilyClient`` replaces ``TavilyClient`` in-process and returns result
+sets whose URLs point back at the fake site.
+
+Latency and payload sizes are configurable so benchmarks can model slow
+upstreams and large pages, and ``throttle_rate`` makes a share of completion
+requests fail with 429 to exercise rate-limit handling.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+import json
+import random
+import threading
+import time
+import zlib
+
+WORDS = (
+    "engineering leadership platform research startup product strategy robotics data "
+    "machine learning conference keynote university board investor community open source "
+    "cloud security design growth team hiring mentor award publication patent"
+).split()
+
+
+def paragraph(rng: random.Random, name: str, words: int = 60) -> str:
+    body = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return f"{name} works on {body}."
+
+
+def render_page(index: int, size: int, name: str = "Jane Doe") -> str:
+    """Deterministic HTML profile page of roughly ``size`` bytes."""
+    rng = random.Random(index)
+    parts = [
+        "<html><head>",
+        f"<title>{name} - Page {index}</title>",
+        f'<meta name="description" content="Profile of {name}">',
+        '<meta name="keywords" content="profile, engineering">',
+        "</head><body>",
+        '<nav><ul><li><a href="/">Home</a></li><li><a href="/about">About</a></li></ul></nav>',
+        f"<h1>{name}</h1>",
+        f'<p><a href="https://www.linkedin.com/in/jane-doe-{index}">LinkedIn</a> '
+        f'<a href="https://twitter.com/janedoe{index}">Twitter</a></p>',
+    ]
+    length = sum(len(p) for p in parts)
+    while length < size:
+        block = f"<p>{paragraph(rng, name)}</p><ul><li>{paragraph(rng, name, 12)}</li></ul>"
+        parts.append(block)
+        length += len(block)
+    parts.append("<footer><p>All rights reserved.</p></footer></body></html>")
+    return ''.join(parts)
+
+
+def sample_from_schema(schema: Dict[str, Any], defs: Dict[str, Any], rng: random.Random,
+                       list_items: int, name: str = 'value') -> Any:
+    """Build a value that satisfies ``schema``, as a model answering the tool call would."""
+    if '$ref' in schema:
+        return sample_from_schema(defs[schema['$ref'].split('/')[-1]], defs, rng, list_items, name)
+    if 'anyOf' in schema:
+        options = [s for s in schema['anyOf'] if s.get('type') != 'null'] or schema['anyOf']
+        return sample_from_schema(options[0], defs, rng, list_items, name)
+
+    kind = schema.get('type')
+    if kind == 'object' or 'properties' in schema:
+        props = schema.get('properties', {})
+        if not props and 'additionalProperties' in schema:
+            return {f"{name}_{i}": f"https://example.com/{name}/{i}" for i in range(2)}
+        return {key: sample_from_schema(sub, defs, rng, list_items, key) for key, sub in props.items()}
+    if kind == 'array':
+        return [sample_from_schema(schema.get('items', {}), defs, rng, list_items, name)
+                for _ in range(list_items)]
+    if kind == 'integer':
+        return rng.randint(1990, 2024)
+    if kind == 'number':
+        return rng.random()
+    if kind == 'boolean':
+        return True
+    if 'date' in name:
+        return f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    return f"{name.replace('_', ' ')} {rng.choice(WORDS)} {rng.choice(WORDS)}"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once; the default backlog of 5 drops them
+    request_queue_size = 256
+
+
+class FakeServer:
+    """Threaded local server for fake pages and a fake OpenAI endpoint."""
+
+    def __init__(self, page_latency: float = 0.05, page_size: int = 50_000,
+                 llm_latency: float = 0.5, llm_token_latency: float = 0.0,
+                 list_items: int = 3, throttle_rate: float = 0.0, port: int = 0):
+        self.page_latency = page_latency
+        self.page_size = page_size
+        self.llm_latency = llm_latency
+        self.llm_token_latency = llm_token_latency
+        self.list_items = list_items
+        self.throttle_rate = throttle_rate
+        self.requests = 0
+        self.throttled = 0
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+        self.httpd = _Server(('127.0.0.1', port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name='fake-server')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        tool = request['tools'][0]['function']
+        schema = tool.get('parameters', {})
+        seed = zlib.crc32(json.dumps(request.get('messages', []), sort_keys=True).encode('utf-8'))
+        arguments = sample_from_schema(schema, schema.get('$defs', {}), random.Random(seed), self.list_items)
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in request.get('messages', []))
+        return {
+            'name': tool['name'],
+            'arguments': json.dumps(arguments),
+            'prompt_tokens': prompt_chars // 4,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if self.path.startswith('/page/'):
+                    time.sleep(server.page_latency)
+                    index = int(self.path.split('/')[2].split('?')[0] or 0)
+                    self._send(200, render_page(index, server.page_size).encode('utf-8'), 'text/html; charset=utf-8')
+                elif self.path == '/robots.txt':
+                    self._send(200, b"User-agent: *\nAllow: /\n", 'text/plain')
+                else:
+                    self._send(404, b'not found', 'text/plain')
+
+            def do_POST(self):
+                with server._lock:
+                    server.requests += 1
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not self.path.endswith('/chat/completions'):
+                    self._send(404, b'{}', 'application/json')
+                    return
+
+                with server._lock:
+                    throttle = server._rng.random() < server.throttle_rate
+                    server.throttled += throttle
+                if throttle:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0.1')
+                    self.send_header('x-ratelimit-remaining-requests', '0')
+                    body = b'{"error": {"message": "Rate limit reached", "type": "requests"}}'
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                result = server.completion(request)
+                completion_tokens = len(result['arguments']) // 4
+                time.sleep(server.llm_latency)
+                model = request.get('model', 'gpt-4')
+                usage = {
+                    'prompt_tokens': result['prompt_tokens'],
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': result['prompt_tokens'] + completion_tokens,
+                }
+                if request.get('stream'):
+                    self._stream(model, result, usage)
+                    return
+
+                time.sleep(server.llm_token_latency * completion_tokens)
+                body = {
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': model,
+                    'choices': [{
+                        'index': 0,
+                        'finish_reason': 'tool_calls',
+                        'message': {
+                            'role': 'assistant',
+                            'content': None,
+                            'tool_calls': [{
+                                'id': 'call_fake',
+                                'type': 'function',
+                                'function': {'name': result['name'], 'arguments': result['arguments']},
+                            }],
+                        },
+                    }],
+                    'usage': usage,
+                }
+                self._send(200, json.dumps(body).encode('utf-8'), 'application/json')
+
+            def _stream(self, model: str, result: Dict[str, Any], usage: Dict[str, int]):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                def event(delta: Dict[str, Any], finish: Optional[str] = None):
+                    chunk = {
+                        'id': 'chatcmpl-fake',
+                        'object': 'chat.completion.chunk',
+                        'created': int(time.time()),
+                        'model': model,
+                        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}],
+                    }
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+
+                event({'role': 'assistant', 'tool_calls': [{
+                    'index': 0, 'id': 'call_fake', 'type': 'function',
+                    'function': {'name': result['name'], 'arguments': ''},
+                }]})
+                arguments = result['arguments']
+                step = 64
+                for start in range(0, len(arguments), step):
+                    piece = arguments[start:start + step]
+                    time.sleep(server.llm_token_latency * len(piece) / 4)
+                    event({'tool_calls': [{'index': 0, 'function': {'arguments': piece}}]})
+                event({}, finish='tool_calls')
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+class FakeTavilyClient:
+    """In-process replacement for ``TavilyClient`` returning pages on the fake site."""
+
+    def __init__(self, site_url: str, latency: float = 0.8, raw_content_size: int = 8_000):
+        self.site_url = site_url
+        self.latency = latency
+        self.raw_content_size = raw_content_size
+        self.calls = 0
+
+    def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        self.calls += 1
+        time.sleep(self.latency)
+        rng = random.Random(query)
+        results = []
+        for i in range(max_results):
+            text = []
+            while sum(len(t) for t in text) < self.raw_content_size:
+                text.append(paragraph(rng, query))
+            index = rng.randint(0, 10_000)
+            results.append({
+                'url': f"{self.site_url}/page/{index}",
+                'title': f"{query} - result {i}",
+                'content': text[0],
+                'raw_content': '\n\n'.join(text),
+            })
+        return {'answer': f"{query} is a technology leader.", 'results': results}
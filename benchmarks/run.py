@@ -0,0 +1,209 @@
+"""Offline benchmark harness.
+
+Drives WebScraper, TavilySearcher, ProfileExtractor and the full pipeline
+against the local fakes in ``benchmarks.fakes`` and reports throughput,
+p50/p95/p99 latency and peak traced memory per scenario. Results are
+written as JSON so runs on different commits can be compared:
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --out bench-new.json --compare bench.json
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks.fakes import FakeServer, FakeTavilyClient
+from utils import metrics
+
+# Failures the pipeline and extractor log and recover from instead of raising
+FAILURE_COUNTERS = ('stage_errors', 'stage_timeouts')
+# Scenarios that make model calls, run for --heavy-iterations instead of --iterations
+HEAVY_SCENARIOS = ('extract', 'pipeline', 'pipeline_first_update')
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def counter_totals(names) -> Dict[str, float]:
+    """Current totals of the named counters in the metrics registry, summed over labels."""
+    totals = dict.fromkeys(names, 0.0)
+    for counter in metrics.REGISTRY.to_dict()['counters']:
+        if counter['name'] in totals:
+            totals[counter['name']] += counter['value']
+    return totals
+
+
+def measure(fn: Callable[[int], Any], iterations: int, concurrency: int,
+            trace_memory: bool = True) -> Dict[str, Any]:
+    """Call ``fn(i)`` for each iteration on ``concurrency`` threads and summarize latencies.
+
+    ``errors`` counts exceptions that reached the harness plus stage failures
+    and timeouts that were logged and skipped along the way; ``llm_errors``
+    counts failed model requests, including ones that were retried.
+    """
+    latencies: List[float] = []
+    errors = 0
+    counters_before = counter_totals(FAILURE_COUNTERS + ('llm_errors',))
+
+    def timed(i: int):
+        start = time.perf_counter()
+        fn(i)
+        return time.perf_counter() - start
+
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(timed, i) for i in range(iterations)]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"  error: {e}", file=sys.stderr)
+    wall = time.perf_counter() - wall_start
+    counters = {name: value - counters_before[name]
+                for name, value in counter_totals(FAILURE_COUNTERS + ('llm_errors',)).items()}
+    peak = 0
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'errors': errors + int(sum(counters[name] for name in FAILURE_COUNTERS)),
+        'llm_errors': int(counters['llm_errors']),
+        'wall_s': round(wall, 4),
+        'throughput_per_s': round(len(latencies) / wall, 3) if wall else 0.0,
+        'p50_s': round(percentile(latencies, 0.50), 4),
+        'p95_s': round(percentile(latencies, 0.95), 4),
+        'p99_s': round(percentile(latencies, 0.99), 4),
+        'peak_mem_mb': round(peak / 1024 / 1024, 2),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def build_components(server: FakeServer, args):
+    # The OpenAI client reads its base URL from the environment
+    os.environ['OPENAI_BASE_URL'] = f"{server.base_url}/v1"
+    from utils.scraper import WebScraper
+    from utils.searcher import TavilySearcher
+    from utils.extractor import ProfileExtractor
+    from utils.pipeline import ProfilePipeline
+    from utils.ratelimit import RateLimiter
+
+    scraper = WebScraper(pool_size=args.concurrency)
+    searcher = TavilySearcher(api_key='offline', cache_ttl=0)
+    searcher.client = FakeTavilyClient(server.base_url, latency=args.search_latency,
+                                       raw_content_size=args.raw_content_size)
+    # The fakes have no quota, so the limiter only paces retries instead of capping throughput
+    extractor = ProfileExtractor(api_key='offline', max_parallel_chunks=args.concurrency,
+                                 split_sections=not args.single_schema,
+                                 limiter=RateLimiter('openai', 100_000, 100_000_000))
+    pipeline = ProfilePipeline(scraper, searcher, extractor, max_workers=args.concurrency * 2)
+    return scraper, searcher, extractor, pipeline
+
+
+def run_scenarios(args) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with FakeServer(page_latency=args.page_latency, page_size=args.page_size,
+                    llm_latency=args.llm_latency, llm_token_latency=args.llm_token_latency,
+                    list_items=args.list_items, throttle_rate=args.throttle_rate) as server:
+        scraper, searcher, extractor, pipeline = build_components(server, args)
+        content = searcher.search("Benchmark Person")['content']
+
+        def first_update(i: int):
+            updates = pipeline.iter_updates(f"Person {i}", f"{server.base_url}/page/{i}")
+            try:
+                next(updates, None)
+            finally:
+                # Stops the lookup's remaining work instead of leaving it running in the background
+                updates.close()
+
+        scenarios: Dict[str, Callable[[int], Any]] = {
+            'scrape': lambda i: scraper.scrape_website(f"{server.base_url}/page/{i}"),
+            'search': lambda i: searcher.search(f"Person {i}"),
+            'extract': lambda i: extractor.extract_profile({'content': content, 'urls': []}, f"Person {i}"),
+            'pipeline': lambda i: pipeline.run(f"Person {i}", f"{server.base_url}/page/{i}"),
+            'pipeline_first_update': first_update,
+        }
+        selected = args.scenarios or list(scenarios)
+        for name in selected:
+            iterations = args.heavy_iterations if name in HEAVY_SCENARIOS else args.iterations
+            print(f"Running {name} ({iterations} iterations)...", file=sys.stderr)
+            results[name] = measure(scenarios[name], iterations, args.concurrency, not args.no_memory)
+        pipeline.close()
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    print(f"{'scenario':24} {'metric':18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, stats in current['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if not old:
+            continue
+        for metric in ('errors', 'throughput_per_s', 'p50_s', 'p95_s', 'p99_s', 'peak_mem_mb'):
+            before, after = old.get(metric, 0), stats.get(metric, 0)
+            change = f"{(after - before) / before * 100:+.1f}%" if before else 'n/a'
+            print(f"{name:24} {metric:18} {before:>10} {after:>10} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline profiler benchmarks")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--heavy-iterations', type=int,
+                        help="Iterations for the extract and pipeline scenarios (default: --iterations / 5)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', nargs='*', help="Subset of scenarios to run")
+    parser.add_argument('--page-latency', type=float, default=0.05)
+    parser.add_argument('--page-size', type=int, default=50_000)
+    parser.add_argument('--search-latency', type=float, default=0.8)
+    parser.add_argument('--raw-content-size', type=int, default=8_000)
+    parser.add_argument('--llm-latency', type=float, default=0.5)
+    parser.add_argument('--llm-token-latency', type=float, default=0.0005)
+    parser.add_argument('--list-items', type=int, default=3, help="Entries per list in fake LLM output")
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help="Share of LLM requests answered with 429")
+    parser.add_argument('--single-schema', action='store_true', help="Extract the whole profile in one call")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc (lower overhead)")
+    parser.add_argument('--out', help="Write results JSON here")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against")
+    args = parser.parse_args()
+    if args.heavy_iterations is None:
+        args.heavy_iterations = max(1, args.iterations // 5)
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': sys.version.split()[0],
+        'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare')},
+        'scenarios': run_scenarios(args),
+    }
+
+    print(json.dumps(results['scenarios'], indent=2))
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
-from datetime import datetime
+from pydantic import BaseModel, Field, create_model
+from typing import List, Optional, Dict, Type
+from datetime import date
+
+from utils.dates import parse_date, format_date
+from utils.timeline import TimelineIndex
 
 class WorkExperience(BaseModel):
     title: Optional[str] = None
@@ -28,6 +31,17 @@ class Event(BaseModel):
     related_people: List[str] = Field(default_factory=list)
     related_organizations: List[str] = Field(default_factory=list)
 
+    # Derived from ``date`` on access (parse_date is memoized), so reassigning ``date`` is always reflected
+    @property
+    def sort_date(self) -> Optional[date]:
+        """First day of the period ``date`` names, or None if it has no recognizable year."""
+        return (parse_date(self.date) or (None, None))[0]
+
+    @property
+    def date_precision(self) -> Optional[str]:
+        """'day', 'month', 'quarter' or 'year'."""
+        return (parse_date(self.date) or (None, None))[1]
+
 class PersonProfile(BaseModel):
     full_name: Optional[str] = Field(None, description="Full name of the person")
     professional_headline: Optional[str] = Field(None, description="Professional title or headline")
@@ -89,6 +103,18 @@ class PersonProfile(BaseModel):
         description="When this profile was last updated"
     )
 
+    def update_activity_date(self, today: Optional[date] = None):
+        """Move last_known_activity_date up to the latest event on or before ``today`` (default: now).
+
+        Not run during validation; ``merge_profiles`` calls it on every merged profile.
+        """
+        latest = TimelineIndex.from_profile(self).most_recent(today)
+        if latest is None:
+            return
+        current = parse_date(self.last_known_activity_date)
+        if current is None or latest.date > current[0]:
+            self.last_known_activity_date = format_date(latest.date, latest.precision)
+
     def add_event(self, event: Event, event_type: str = "recent"):
         """Add an event to the appropriate category based on its type and date"""
         if event_type == "key":
@@ -102,9 +128,41 @@ class PersonProfile(BaseModel):
         """Sort all event lists by date"""
         for event_list in [self.key_events, self.recent_events, self.upcoming_events]:
             event_list.sort(
-                key=lambda x: datetime.strptime(x.date, "%Y-%m-%d") if x.date else datetime.max,
+                key=lambda x: x.sort_date or date.max,
                 reverse=True
             )
 
     class Config:
-        arbitrary_types_allowed = True
\ No newline at end of file
+        arbitrary_types_allowed = True
+
+
+def _section(name: str, doc: str, fields: List[str]) -> Type[BaseModel]:
+    """Build a model holding a subset of PersonProfile's fields, with identical definitions."""
+    definitions = {f: (PersonProfile.model_fields[f].annotation, PersonProfile.model_fields[f]) for f in fields}
+    return create_model(name, __doc__=doc, **definitions)
+
+IdentitySection = _section(
+    'IdentitySection', "Who the person is and where to find them online",
+    ['full_name', 'professional_headline', 'current_role', 'company', 'location',
+     'social_profiles', 'websites', 'languages']
+)
+CareerSection = _section(
+    'CareerSection', "Career history, education and professional network",
+    ['work_experience', 'education', 'skills', 'certifications', 'organizations', 'collaborations']
+)
+ContentSection = _section(
+    'ContentSection', "Publications, speaking, recognition and interests",
+    ['publications', 'speaking_engagements', 'achievements', 'interests', 'key_topics', 'interesting_facts']
+)
+EventsSection = _section(
+    'EventsSection', "Timeline of key, recent and upcoming events",
+    ['key_events', 'recent_events', 'upcoming_events', 'last_known_activity_date']
+)
+
+# Independent parts of PersonProfile that can be extracted in parallel
+PROFILE_SECTIONS: Dict[str, Type[BaseModel]] = {
+    'identity': IdentitySection,
+    'career': CareerSection,
+    'content': ContentSection,
+    'events': EventsSection,
+}
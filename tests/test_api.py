@@ -0,0 +1,69 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from api import ProfilerServer
+
+
+class FakeJob:
+    id = 'job-1'
+    done = True
+
+    def wait(self, timeout):
+        pass
+
+    def to_dict(self):
+        return {'id': self.id, 'status': 'done'}
+
+
+class FakeJobs:
+    pending = 0
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, query, url=None):
+        self.submitted.append((query, url))
+        return FakeJob()
+
+
+@pytest.fixture
+def server():
+    server = ProfilerServer(('127.0.0.1', 0), FakeJobs())
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    conn.request('POST', '/profiles', body=body, headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    result = response.status, json.loads(response.read())
+    conn.close()
+    return result
+
+
+@pytest.mark.parametrize('body', [
+    '{"query": 123}',
+    '["Jane Doe"]',
+    '{"query": "Jane Doe", "url": 5}',
+    '{"url": ["https://jane.dev"]}',
+    '{"query": "  "}',
+    '{"query": "Jane Doe", "wait": "soon"}',
+    'not json',
+])
+def test_bad_bodies_are_rejected(server, body):
+    status, response = post(server, body)
+    assert status == 400 and response['error']
+    assert server.jobs.submitted == []
+
+
+def test_url_alone_is_the_query(server):
+    assert post(server, '{"url": " https://jane.dev ", "query": null}')[0] == 200
+    assert post(server, '{"query": "Jane Doe", "wait": 1}')[0] == 200
+    assert server.jobs.submitted == [('https://jane.dev', 'https://jane.dev'), ('Jane Doe', None)]
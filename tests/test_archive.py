@@ -0,0 +1,52 @@
+import io
+from datetime import date
+
+import pytest
+
+from models.profile_models import Education, Event, PersonProfile, WorkExperience
+from utils.archive import LazyProfile, dump_binary, dump_jsonl, iter_binary, iter_jsonl
+
+PROFILES = [
+    PersonProfile(
+        full_name='Jane Doe', current_role='CTO', company='Acme', skills=['Go', 'Rust'],
+        social_profiles={'github': 'https://github.com/janedoe'},
+        work_experience=[WorkExperience(title='CTO', company='Acme', duration='2020 - now')],
+        education=[Education(degree='PhD', institution='MIT', year='2012')],
+        key_events=[Event(title='Joined Acme', date='March 2020', related_organizations=['Acme'])],
+        recent_events=[Event(title='Keynote', date='2024-05-02', event_type='speaking')],
+        last_known_activity_date='2024-05-02',
+    ),
+    PersonProfile(full_name='Bob Smith'),
+]
+
+FORMATS = [
+    (lambda profiles: _dump(dump_jsonl, io.StringIO, profiles), iter_jsonl),
+    (lambda profiles: _dump(dump_binary, io.BytesIO, profiles), iter_binary),
+]
+
+
+def _dump(dump, buffer_type, profiles):
+    buffer = buffer_type()
+    assert dump(profiles, buffer) == len(profiles)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize('dump, load', FORMATS, ids=['jsonl', 'binary'])
+@pytest.mark.parametrize('mode', ['validated', 'trusted', 'lazy'])
+def test_round_trip(dump, load, mode):
+    loaded = list(load(dump(PROFILES), trusted=mode == 'trusted', lazy=mode == 'lazy'))
+    if mode == 'lazy':
+        assert all(isinstance(profile, LazyProfile) for profile in loaded)
+        assert loaded[0].key_events[0].title == 'Joined Acme'
+        loaded = [profile.to_profile() for profile in loaded]
+    assert all(type(profile) is PersonProfile for profile in loaded)
+    assert [profile.model_dump() for profile in loaded] == [profile.model_dump() for profile in PROFILES]
+
+    jane = loaded[0]
+    assert type(jane.work_experience[0]) is WorkExperience
+    assert jane.key_events[0].sort_date == date(2020, 3, 1)
+    jane.key_events[0].date = '2019'
+    assert jane.key_events[0].sort_date == date(2019, 1, 1)
+    assert loaded[1].model_fields_set >= {'full_name'}
+    assert loaded[1].key_events == [] and loaded[1].social_profiles == {}
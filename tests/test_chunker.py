@@ -0,0 +1,58 @@
+import pytest
+
+from utils import chunker
+from utils.chunker import count_tokens, split_into_chunks
+
+
+class ByteEncoding:
+    """Stand-in for a tiktoken encoding with one token per UTF-8 byte, so CJK is 3 tokens a character."""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text.encode('utf-8'))
+
+    def decode_single_token_bytes(self, token):
+        return bytes([token])
+
+    def decode_bytes(self, tokens):
+        return bytes(tokens)
+
+    def decode(self, tokens):
+        return bytes(tokens).decode('utf-8', errors='replace')
+
+
+@pytest.fixture
+def byte_tokens(monkeypatch):
+    monkeypatch.setattr(chunker, '_encoding', lambda: ByteEncoding())
+
+
+@pytest.mark.parametrize('text', [
+    '数据库系统的设计与实现。' * 400,
+    'def f(x):{return [x**2 for x in range(10)]};' * 300,
+    'Jane Doe joined Acme in 2020. She leads the platform team.\n' * 200,
+])
+def test_oversized_paragraphs_are_cut_to_the_token_budget(byte_tokens, text):
+    chunks = split_into_chunks(text, chunk_tokens=500, max_total_tokens=10 ** 6)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 500 for chunk in chunks)
+    # Nothing is lost or split mid-character
+    assert ''.join(''.join(chunks).split()) == ''.join(text.split())
+
+
+def test_cuts_prefer_sentence_ends(byte_tokens):
+    text = 'Jane Doe joined Acme in 2020. ' * 100
+    for piece in chunker._split_oversized(text, 200):
+        assert piece.endswith('.')
+
+
+def test_character_estimate_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(chunker, '_encoding', lambda: None)
+    chunks = split_into_chunks('word ' * 5000, chunk_tokens=300, max_total_tokens=10 ** 6)
+    assert all(count_tokens(chunk) <= 300 for chunk in chunks)
+
+
+def test_chunks_stop_at_the_total_budget():
+    paragraphs = '\n\n'.join(f"Paragraph {i} about Jane Doe." for i in range(200))
+    chunks = split_into_chunks(paragraphs, chunk_tokens=50, max_total_tokens=200)
+    kept = '\n\n'.join(chunks).split('\n\n')
+    assert sum(count_tokens(p) for p in kept) <= 200
+    assert kept[0] == 'Paragraph 0 about Jane Doe.' and len(kept) < 200
@@ -0,0 +1,40 @@
+from datetime import date
+
+import pytest
+
+from utils.dates import DAY, MONTH, QUARTER, YEAR, parse_date, format_date
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('2024-03-15', (date(2024, 3, 15), DAY)),
+    ('March 15, 2024', (date(2024, 3, 15), DAY)),
+    ('15th of March 2024', (date(2024, 3, 15), DAY)),
+    ('3/15/2024', (date(2024, 3, 15), DAY)),
+    ('March 2024', (date(2024, 3, 1), MONTH)),
+    ('2024-03', (date(2024, 3, 1), MONTH)),
+    ('Sept. 2023', (date(2023, 9, 1), MONTH)),
+    ('Q3 2023', (date(2023, 7, 1), QUARTER)),
+    ('2023 Q3', (date(2023, 7, 1), QUARTER)),
+    ('Summer 2022', (date(2022, 7, 1), QUARTER)),
+    ('in 2019', (date(2019, 1, 1), YEAR)),
+])
+def test_parses_free_form_dates(text, expected):
+    assert parse_date(text) == expected
+
+
+@pytest.mark.parametrize('text', [None, '', 'recently', 'next spring'])
+def test_rejects_dates_without_a_year(text):
+    assert parse_date(text) is None
+
+
+def test_invalid_month_falls_back_to_the_year():
+    assert parse_date('2024-13') == (date(2024, 1, 1), YEAR)
+
+
+def test_case_and_whitespace_do_not_matter():
+    assert parse_date('  MARCH   2024 ') == parse_date('march 2024')
+
+
+def test_format_date_round_trips_each_precision():
+    for text in ('2024-03-15', '2024-03', '2023-Q3', '2019'):
+        assert format_date(*parse_date(text)) == text
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from models.profile_models import PROFILE_SECTIONS
+from utils import extractor as extractor_module
+from utils.chunker import count_tokens
+from utils.extractor import ProfileExtractor, _schema_tokens
+
+
+def test_streamed_usage_estimate_includes_the_response_schema(monkeypatch):
+    model = PROFILE_SECTIONS['identity']
+    snapshot = model(full_name='Jane Doe')
+    recorded = []
+    monkeypatch.setattr(extractor_module.metrics, 'record_llm_usage',
+                        lambda name, prompt, completion: recorded.append((prompt, completion)))
+
+    extractor = ProfileExtractor(api_key='test')
+    completions = SimpleNamespace(create_partial=lambda **kwargs: iter([snapshot]))
+    extractor.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    assert extractor._complete('Who is Jane Doe?', model, 'gpt-4', on_partial=lambda partial: None) == snapshot
+
+    assert _schema_tokens(model) > 0
+    assert recorded == [(count_tokens('Who is Jane Doe?') + _schema_tokens(model),
+                         count_tokens(snapshot.model_dump_json()))]
+
+
+def test_chunks_only_go_to_sections_they_mention(monkeypatch):
+    extractor = ProfileExtractor(api_key='test', chunk_tokens=20, preprocess=False)
+    calls = []
+
+    def complete(prompt, response_model, model, on_partial=None, cancel=None):
+        section = next(name for name, section_model in PROFILE_SECTIONS.items() if section_model is response_model)
+        calls.append((section, 'Acme' in prompt))
+        return response_model()
+
+    monkeypatch.setattr(extractor, '_complete', complete)
+    content = ('Jane Doe is based in Berlin and goes by @janedoe online.\n\n'
+               'She worked at Acme as a staff engineer after graduating from MIT.')
+    extractor.extract_profile({'content': content, 'urls': ['https://jane.dev']}, 'Jane Doe')
+    assert sorted(calls) == [('career', True), ('identity', False), ('identity', True)]
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from utils.fanout import FanOutScraper, RobotsDisallowedError
+
+
+class Response:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.text = text
+
+
+class FakeScraper:
+    headers = {'User-Agent': 'test'}
+    timeout = 5
+
+    def __init__(self, robots='', fetch_seconds=0.0):
+        self.robots = robots
+        self.fetch_seconds = fetch_seconds
+        self.robots_fetches = []
+        self.fetched = []
+        self.lock = threading.Lock()
+        self.session = self
+
+    def get(self, url, timeout=None):
+        with self.lock:
+            self.robots_fetches.append(url)
+        time.sleep(0.05)
+        return Response(200, self.robots)
+
+    def scrape_website(self, url):
+        time.sleep(self.fetch_seconds)
+        with self.lock:
+            self.fetched.append((url, time.monotonic()))
+        return {'text_content': url}
+
+
+def test_a_delayed_domain_does_not_hold_up_others():
+    scraper = FakeScraper()
+    fanout = FanOutScraper(scraper, max_concurrency=2, per_domain_concurrency=1, min_domain_delay=0.5)
+    started = time.monotonic()
+    slow = [fanout.submit(f'https://slow.example/{i}') for i in range(4)]
+    fast = fanout.submit('https://fast.example/')
+    assert fast.result(timeout=5) == {'text_content': 'https://fast.example/'}
+    assert time.monotonic() - started < 0.5
+    for future in slow:
+        future.result(timeout=5)
+    times = sorted(t for url, t in scraper.fetched if 'slow.example' in url)
+    assert all(b - a >= 0.45 for a, b in zip(times, times[1:]))
+
+
+def test_robots_txt_is_fetched_once_per_host():
+    scraper = FakeScraper(robots='User-agent: *\nDisallow: /private\n')
+    fanout = FanOutScraper(scraper, max_concurrency=8, min_domain_delay=0)
+    futures = [fanout.submit(f'https://jane.dev/{i}') for i in range(8)]
+    blocked = fanout.submit('https://jane.dev/private/cv')
+    for future in futures:
+        future.result(timeout=5)
+    with pytest.raises(RobotsDisallowedError):
+        blocked.result(timeout=5)
+    assert scraper.robots_fetches == ['https://jane.dev/robots.txt']
+
+
+def test_cancelled_work_is_never_fetched():
+    scraper = FakeScraper()
+    fanout = FanOutScraper(scraper, per_domain_concurrency=1, min_domain_delay=0.3)
+    first = fanout.submit('https://jane.dev/a')
+    second = fanout.submit('https://jane.dev/b')
+    first.result(timeout=5)
+    assert second.cancel()
+    time.sleep(0.5)
+    assert [url for url, _ in scraper.fetched] == ['https://jane.dev/a']
@@ -0,0 +1,54 @@
+from models.profile_models import PersonProfile, WorkExperience, Event
+from utils.merge import merge_profiles
+
+
+def test_string_lists_keep_values_that_differ_only_in_punctuation():
+    merged = merge_profiles([
+        PersonProfile(skills=['C', 'C++', 'C#', '.NET', 'Go']),
+        PersonProfile(skills=['c++', ' Go ', 'NET']),
+    ])
+    assert merged.skills == ['C', 'C++', 'C#', '.NET', 'Go', 'NET']
+
+
+def test_string_lists_dedupe_ignoring_case_and_whitespace():
+    merged = merge_profiles([
+        PersonProfile(websites=['https://jane.dev/', 'https://jane.dev/blog']),
+        PersonProfile(websites=['HTTPS://JANE.DEV/', 'https://jane.dev/blog/']),
+    ])
+    assert merged.websites == ['https://jane.dev/', 'https://jane.dev/blog', 'https://jane.dev/blog/']
+
+
+def test_scalars_keep_first_non_empty_value():
+    merged = merge_profiles([
+        PersonProfile(full_name=None, company='Acme'),
+        PersonProfile(full_name='Jane Doe', company='Other'),
+    ])
+    assert (merged.full_name, merged.company) == ('Jane Doe', 'Acme')
+
+
+def test_entries_with_same_key_fill_each_others_gaps():
+    merged = merge_profiles([
+        PersonProfile(work_experience=[WorkExperience(title='CTO', company='Acme')]),
+        PersonProfile(work_experience=[WorkExperience(title='cto', company='ACME', duration='2020-')]),
+    ])
+    assert len(merged.work_experience) == 1
+    assert merged.work_experience[0].title == 'CTO'
+    assert merged.work_experience[0].duration == '2020-'
+
+
+def test_events_with_differently_written_dates_merge():
+    merged = merge_profiles([
+        PersonProfile(key_events=[Event(title='Joined Acme', date='March 2024')]),
+        PersonProfile(key_events=[Event(title='Joined Acme', date='2024-03', url='https://acme.com/news')]),
+        PersonProfile(key_events=[Event(title='Joined Acme', date='2023')]),
+    ])
+    assert [e.date for e in merged.key_events] == ['March 2024', '2023']
+    assert merged.key_events[0].url == 'https://acme.com/news'
+
+
+def test_inputs_are_not_modified():
+    first = PersonProfile(skills=['Rust'], work_experience=[WorkExperience(title='CTO', company='Acme')])
+    second = PersonProfile(skills=['Go'], work_experience=[WorkExperience(title='CTO', company='Acme', duration='1y')])
+    merge_profiles([first, second])
+    assert first.skills == ['Rust']
+    assert first.work_experience[0].duration is None
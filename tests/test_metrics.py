@@ -0,0 +1,12 @@
+from utils.metrics import Registry
+
+
+def test_prometheus_label_values_are_escaped():
+    registry = Registry()
+    registry.incr('stage_errors', stage='fetch "a"\\b\nc')
+    registry.observe('stage_seconds', 1.5, stage='x"y')
+    text = registry.to_prometheus()
+    assert 'profiler_stage_errors_total{stage="fetch \\"a\\"\\\\b\\nc"} 1' in text
+    assert 'profiler_stage_seconds_sum{stage="x\\"y"} 1.5' in text
+    # Every sample stays on one line
+    assert all(line.startswith(('#', 'profiler_')) for line in text.splitlines())
@@ -0,0 +1,75 @@
+import threading
+
+from models.profile_models import PersonProfile
+from utils.merge import merge_profiles
+from utils.pipeline import ProfilePipeline
+from utils.profile_store import ProfileStore
+
+PAGES = {
+    'https://jane.dev/about': 'Jane Doe is the CTO of Acme.',
+    'https://news.example/acme': 'Acme appointed Jane Doe as CTO in 2020.',
+}
+
+
+class FakeSearcher:
+    def __init__(self):
+        self.answer = 'Jane Doe is a technology leader.'
+        self.pages = dict(PAGES)
+
+    def search(self, query):
+        results = [{'url': url, 'content': text[:10], 'raw_content': text} for url, text in self.pages.items()]
+        return {
+            'content': f"Summary: {self.answer}\n\n" + ''.join(f"\nContent from {r['url']}:\n{r['raw_content']}\n"
+                                                              for r in results),
+            'urls': list(self.pages),
+            'search_results': {'answer': self.answer, 'results': results},
+        }
+
+
+class FakeExtractor:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def extract_profile(self, data, query, on_partial=None, cancel=None):
+        with self.lock:
+            self.calls.append(data['urls'][0])
+        return PersonProfile(full_name='Jane Doe', data_sources=list(data['urls']))
+
+    def merge_profiles(self, profiles):
+        return merge_profiles(profiles)
+
+
+def pipeline(tmp_path, searcher, extractor):
+    return ProfilePipeline(None, searcher, extractor, store=ProfileStore(str(tmp_path / 'profiles.db')))
+
+
+def test_search_results_are_stored_per_page(tmp_path):
+    searcher, extractor = FakeSearcher(), FakeExtractor()
+    with pipeline(tmp_path, searcher, extractor) as p:
+        profile = p.refresh('Jane Doe')
+        records = p.store.sources(p.store.key('Jane Doe'))
+    assert sorted(extractor.calls) == sorted(PAGES)
+    assert sorted(records) == sorted(f'search:{url}' for url in PAGES)
+    assert all(record.fetched_at > 0 and record.urls == [record.source[7:]] for record in records.values())
+    assert sorted(profile.data_sources) == sorted(PAGES)
+
+
+def test_a_new_answer_over_the_same_pages_extracts_nothing(tmp_path):
+    searcher, extractor = FakeSearcher(), FakeExtractor()
+    with pipeline(tmp_path, searcher, extractor) as p:
+        p.refresh('Jane Doe')
+        extractor.calls.clear()
+        searcher.answer = 'Jane Doe leads engineering at Acme.'
+        p.refresh('Jane Doe')
+    assert extractor.calls == []
+
+
+def test_only_changed_pages_are_re_extracted(tmp_path):
+    searcher, extractor = FakeSearcher(), FakeExtractor()
+    with pipeline(tmp_path, searcher, extractor) as p:
+        p.refresh('Jane Doe')
+        extractor.calls.clear()
+        searcher.pages['https://news.example/acme'] += ' She previously led platform at Initech.'
+        p.refresh('Jane Doe')
+    assert extractor.calls == ['https://news.example/acme']
@@ -0,0 +1,43 @@
+from utils.preprocess import select_passages
+
+
+def test_keeps_passages_that_only_contain_boilerplate_words_inside_other_words():
+    content = (
+        "Jane Doe leads product design in Berlin at Acme.\n\n"
+        "Jane Doe writes a blog in her spare time about engineering teams.\n\n"
+        "Jane Doe joined Acme in 2020."
+    )
+    result = select_passages(content, "Jane Doe", 1000)
+    assert result.boilerplate_removed == 0
+    assert "design in Berlin" in result.content
+    assert "blog in her spare time" in result.content
+
+
+def test_drops_banners():
+    content = (
+        "Jane Doe is the CTO of Acme.\n\n"
+        "We use cookies to improve your experience. Accept all to continue.\n\n"
+        "Sign in to read the full article."
+    )
+    result = select_passages(content, "Jane Doe", 1000)
+    assert result.boilerplate_removed == 2
+    assert result.content == "Jane Doe is the CTO of Acme."
+
+
+def test_removes_near_duplicates_across_sources():
+    bio = "Jane Doe is the CTO of Acme, where she leads the platform and data engineering teams in Berlin."
+    content = (
+        f"Content from https://a.example:\n{bio}\n\n"
+        f"Content from https://b.example:\n{bio.replace('Berlin', 'Berlin.')}"
+    )
+    result = select_passages(content, "Jane Doe", 1000)
+    assert result.duplicates_removed == 1
+    assert result.content.count("CTO of Acme") == 1
+
+
+def test_prefers_relevant_passages_within_budget():
+    relevant = "Jane Doe founded Acme after a PhD at MIT and is now its CEO."
+    filler = "The weather in the city was mild for most of the spring season this year."
+    result = select_passages("\n\n".join([filler, relevant, filler.replace("mild", "warm")]), "Jane Doe", 20)
+    assert result.content == relevant
+    assert result.tokens_saved > 0
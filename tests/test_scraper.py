@@ -0,0 +1,39 @@
+from utils.scraper import WebScraper
+
+
+def parse(html):
+    return WebScraper().parse(html, 'https://jane.dev')
+
+
+def test_nested_blocks_are_separated():
+    result = parse('<ul><li><h3>Acme</h3><p>Chief Technology Officer</p><span>2020</span>-<b>now</b></li></ul>')
+    assert result['text_content'] == 'Acme Chief Technology Officer 2020 - now'
+
+
+def test_scripts_and_styles_inside_text_tags_are_dropped():
+    result = parse(
+        '<p>Jane Doe<script>var tracking = 1;</script><style>.x{color:red}</style>'
+        '<noscript><script>alert(1)</script>Enable JS</noscript> leads design.</p>'
+    )
+    assert result['text_content'] == 'Jane Doe leads design.'
+
+
+def test_json_ld_inside_text_tags_is_still_collected():
+    result = parse('<div><p>Bio<script type="application/ld+json">{"@type": "Person", "name": "Jane Doe"}'
+                   '</script></p></div>')
+    assert result['text_content'] == 'Bio'
+    assert result['structured_data']['json_ld'] == [{'@type': 'Person', 'name': 'Jane Doe'}]
+
+
+def test_meta_title_and_social_links():
+    result = parse(
+        '<html><head><title>Jane Doe</title><meta name="description" content="CTO at Acme"></head>'
+        '<body><a href="https://www.linkedin.com/in/janedoe">LinkedIn</a>'
+        '<li>See <a href="https://twitter.com/janedoe">Twitter</a></li></body></html>'
+    )
+    assert result['title'] == 'Jane Doe'
+    assert result['meta_description'] == 'CTO at Acme'
+    assert result['social_links'] == {
+        'linkedin': 'https://www.linkedin.com/in/janedoe',
+        'twitter': 'https://twitter.com/janedoe',
+    }
@@ -0,0 +1,56 @@
+from utils.scraper import WebScraper
+from utils.structured import profile_from_structured
+
+ARTICLE_URL = 'https://news.example/2024/acme-raises'
+BYLINE = {
+    '@type': 'NewsArticle',
+    'headline': 'Acme raises a round',
+    'author': {'@type': 'Person', 'name': 'Bob Smith', 'jobTitle': 'Reporter', 'worksFor': 'News Co'},
+}
+
+
+def test_article_bylines_are_not_the_subject():
+    assert profile_from_structured({'json_ld': [BYLINE]}, ARTICLE_URL) is None
+    assert profile_from_structured({'json_ld': [BYLINE]}, 'Bob Smith') is None
+
+
+def test_profile_page_main_entity_is_the_subject():
+    page = {
+        '@context': 'https://schema.org',
+        '@graph': [
+            {'@type': 'ProfilePage', 'mainEntity': {'@id': '#jane'}},
+            {'@type': 'Person', '@id': '#jane', 'name': 'Jane Doe', 'jobTitle': 'CTO',
+             'worksFor': {'@type': 'Organization', 'name': 'Acme'},
+             'alumniOf': [{'@type': 'CollegeOrUniversity', 'name': 'MIT'}],
+             'sameAs': ['https://github.com/janedoe'],
+             'knows': {'@type': 'Person', 'name': 'Bob Smith'}},
+            {'@type': 'Person', 'name': 'Carol Jones'},
+        ],
+    }
+    profile = profile_from_structured({'json_ld': [page, BYLINE]}, 'https://jane.dev')
+    assert (profile.full_name, profile.current_role, profile.company) == ('Jane Doe', 'CTO', 'Acme')
+    assert [e.institution for e in profile.education] == ['MIT']
+    assert profile.social_profiles == {'github': 'https://github.com/janedoe'}
+
+
+def test_name_query_picks_the_matching_person():
+    people = [{'@type': 'Person', 'name': 'Carol Jones'}, {'@type': 'Person', 'name': 'Jane Doe'}]
+    assert profile_from_structured({'json_ld': people}, 'Jane Doe, CTO at Acme').full_name == 'Jane Doe'
+    assert profile_from_structured({'json_ld': people}, 'https://example.com/team') is None
+
+
+def test_scraper_collects_hcard_and_opengraph():
+    html = '''<html><head>
+    <meta property="og:type" content="profile">
+    <meta property="profile:first_name" content="Jane"><meta property="profile:last_name" content="Doe">
+    <script type="application/ld+json">not json</script>
+    </head><body>
+    <div class="h-card"><a class="p-name u-url" href="https://jane.dev">Jane Doe</a>
+      <span class="p-job-title">CTO</span> at <span class="p-org h-card">Acme</span></div>
+    </body></html>'''
+    data = WebScraper().parse(html, 'https://jane.dev')['structured_data']
+    assert data['json_ld'] == []
+    assert len(data['hcards']) == 1
+    profile = profile_from_structured(data, 'Jane Doe')
+    assert (profile.full_name, profile.current_role, profile.company) == ('Jane Doe', 'CTO', 'Acme')
+    assert profile.websites == ['https://jane.dev']
@@ -0,0 +1,35 @@
+from datetime import date
+
+from models.profile_models import Event, PersonProfile
+from utils.merge import merge_profiles
+from utils.timeline import TimelineEntry, TimelineIndex
+
+
+def test_sort_date_follows_reassignment():
+    event = Event(title='Joined Acme', date='March 2024')
+    assert (event.sort_date, event.date_precision) == (date(2024, 3, 1), 'month')
+    event.date = 'Q3 2023'
+    assert (event.sort_date, event.date_precision) == (date(2023, 7, 1), 'quarter')
+    event.date = 'soon'
+    assert event.sort_date is None
+
+
+def test_most_recent_per_owner():
+    entries = [TimelineEntry(date(2020 + i, 1, 1), 'year', 'key_events', i, f'owner{i % 3}') for i in range(9)]
+    index = TimelineIndex(entries[:6])
+    for entry in entries[6:]:
+        index.add(entry)
+    assert index.most_recent(date(2030, 1, 1)).event == 8
+    assert index.most_recent(date(2030, 1, 1), owner='owner0').event == 6
+    assert index.most_recent(date(2025, 6, 1), owner='owner1').event == 4
+    assert index.most_recent(date(2020, 6, 1), owner='owner2') is None
+    assert index.most_recent(owner='nobody') is None
+
+
+def test_activity_date_is_filled_on_merge_not_validation():
+    data = {'recent_events': [{'title': 'Keynote', 'date': '2024-05-02'}, {'title': 'Launch', 'date': '2099'}]}
+    profile = PersonProfile.model_validate(data)
+    assert profile.last_known_activity_date is None
+    assert merge_profiles([profile]).last_known_activity_date == '2024-05-02'
+    profile.update_activity_date(today=date(2024, 1, 1))
+    assert profile.last_known_activity_date is None
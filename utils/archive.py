@@ -0,0 +1,219 @@
+"""Bulk export and import of PersonProfile collections.
+
+Two streaming formats, both read one record at a time so memory stays flat
+however large the archive is:
+
+* JSONL: one ``PersonProfile`` JSON object per line, the format batch.py
+  writes.
+* Binary: a layout header followed by length-prefixed frames. Each frame
+  stores the plain fields as one positional JSON array. Each list of nested
+  entries (jobs, degrees, publications, events) is stored as its own
+  separately encoded part, so it can be skipped or decoded on demand.
+
+Both readers validate by default. Archives this code wrote are already
+validated, so pass ``trusted=True`` to build the models with
+``model_construct`` instead, skipping validation. ``lazy=True`` goes
+further and returns ``LazyProfile`` objects that decode an entry list only
+when it is first accessed.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Type, Union, get_args, get_origin
+import json
+import struct
+
+from pydantic import BaseModel
+
+from models.profile_models import PersonProfile
+
+MAGIC = b'PROFARC1'
+_LENGTH = struct.Struct('<I')
+_COMPACT = (',', ':')
+
+
+def _entry_fields(cls: Type[BaseModel]) -> Dict[str, Type[BaseModel]]:
+    """Fields of ``cls`` that hold lists of nested models, with the model type."""
+    entries = {}
+    for name, field in cls.model_fields.items():
+        if get_origin(field.annotation) is list:
+            (item,) = get_args(field.annotation)
+            if isinstance(item, type) and issubclass(item, BaseModel):
+                entries[name] = item
+    return entries
+
+
+ENTRY_FIELDS = _entry_fields(PersonProfile)
+FLAT_FIELDS = [name for name in PersonProfile.model_fields if name not in ENTRY_FIELDS]
+
+
+def construct_profile(data: Dict[str, Any]) -> PersonProfile:
+    """Build a PersonProfile from trusted, already-validated data without validating it."""
+    values = dict(data)
+    for name, cls in ENTRY_FIELDS.items():
+        items = values.get(name)
+        if items:
+            values[name] = [cls.model_construct(**item) for item in items]
+    return PersonProfile.model_construct(**values)
+
+
+class LazyProfile:
+    """Read-only view of a stored profile that decodes entry lists on first access.
+
+    Attribute access mirrors PersonProfile; ``to_profile()`` materializes
+    the full model.
+    """
+
+    __slots__ = ('_flat', '_raw', '_layouts', '_decoded')
+
+    def __init__(self, flat: Dict[str, Any], raw: Dict[str, Any], layouts: Dict[str, List[str]]):
+        self._flat = flat
+        self._raw = raw
+        self._layouts = layouts
+        self._decoded: Dict[str, list] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._flat:
+            return self._flat[name]
+        if name in ENTRY_FIELDS:
+            if name not in self._decoded:
+                self._decoded[name] = self._decode(name)
+            return self._decoded[name]
+        if name in PersonProfile.model_fields:
+            return PersonProfile.model_fields[name].get_default(call_default_factory=True)
+        raise AttributeError(name)
+
+    def _decode(self, name: str) -> list:
+        raw = self._raw.get(name)
+        if not raw:
+            return []
+        cls, layout = ENTRY_FIELDS[name], self._layouts.get(name)
+        items = json.loads(raw) if isinstance(raw, (bytes, bytearray, memoryview, str)) else raw
+        if layout is None:
+            return [cls.model_construct(**item) for item in items]
+        return [cls.model_construct(**dict(zip(layout, item))) for item in items]
+
+    def to_profile(self) -> PersonProfile:
+        values = dict(self._flat)
+        for name in ENTRY_FIELDS:
+            values[name] = getattr(self, name)
+        return PersonProfile.model_construct(**values)
+
+
+def _open(target, mode: str):
+    if isinstance(target, (str, bytes)) or hasattr(target, '__fspath__'):
+        return open(target, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})), True
+    return target, False
+
+
+def dump_jsonl(profiles: Iterable[PersonProfile], target) -> int:
+    """Write profiles as JSON lines to a path or text file; returns the count."""
+    f, owned = _open(target, 'w')
+    count = 0
+    try:
+        for profile in profiles:
+            f.write(profile.model_dump_json())
+            f.write('\n')
+            count += 1
+    finally:
+        if owned:
+            f.close()
+    return count
+
+
+def iter_jsonl(source, trusted: bool = False,
+               lazy: bool = False) -> Iterator[Union[PersonProfile, LazyProfile]]:
+    """Stream profiles from a JSONL path or text file."""
+    f, owned = _open(source, 'r')
+    try:
+        for line in f:
+            if not line.strip():
+                continue
+            if not (trusted or lazy):
+                yield PersonProfile.model_validate_json(line)
+                continue
+            data = json.loads(line)
+            if lazy:
+                raw = {name: data.pop(name, None) for name in ENTRY_FIELDS}
+                yield LazyProfile(data, raw, {})
+            else:
+                yield construct_profile(data)
+    finally:
+        if owned:
+            f.close()
+
+
+def dump_binary(profiles: Iterable[PersonProfile], target) -> int:
+    """Write profiles in the binary archive format to a path or binary file; returns the count."""
+    layout = {
+        'fields': FLAT_FIELDS,
+        'entries': {name: list(cls.model_fields) for name, cls in ENTRY_FIELDS.items()},
+    }
+    header = json.dumps(layout, separators=_COMPACT).encode('utf-8')
+    f, owned = _open(target, 'wb')
+    count = 0
+    try:
+        f.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        for profile in profiles:
+            data = profile.model_dump(mode='json')
+            parts = [json.dumps([data[name] for name in FLAT_FIELDS], separators=_COMPACT).encode('utf-8')]
+            for name, fields in layout['entries'].items():
+                items = data[name]
+                parts.append(json.dumps([[item[field] for field in fields] for item in items],
+                                        separators=_COMPACT).encode('utf-8') if items else b'')
+            # Frame: part count, part lengths, then the parts back to back
+            frame = struct.pack(f'<H{len(parts)}I', len(parts), *(len(p) for p in parts)) + b''.join(parts)
+            f.write(_LENGTH.pack(len(frame)) + frame)
+            count += 1
+    finally:
+        if owned:
+            f.close()
+    return count
+
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated profile archive")
+    return data
+
+
+def iter_binary(source, trusted: bool = False,
+                lazy: bool = False) -> Iterator[Union[PersonProfile, LazyProfile]]:
+    """Stream profiles from a binary archive path or binary file."""
+    f, owned = _open(source, 'rb')
+    try:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a profile archive")
+        (size,) = _LENGTH.unpack(_read_exact(f, _LENGTH.size))
+        layout = json.loads(_read_exact(f, size))
+        flat_fields: List[str] = layout['fields']
+        entry_layouts: Dict[str, List[str]] = layout['entries']
+        # Fields this version no longer has are dropped rather than passed to the model
+        known = set(PersonProfile.model_fields)
+        entry_names = [name if name in ENTRY_FIELDS else None for name in entry_layouts]
+
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if not prefix:
+                break
+            (size,) = _LENGTH.unpack(prefix)
+            frame = memoryview(_read_exact(f, size))
+            (count,) = struct.unpack_from('<H', frame)
+            lengths = struct.unpack_from(f'<{count}I', frame, 2)
+            offset = 2 + 4 * count
+            parts: List[memoryview] = []
+            for length in lengths:
+                parts.append(frame[offset:offset + length])
+                offset += length
+
+            flat = {name: value for name, value in zip(flat_fields, json.loads(bytes(parts[0]))) if name in known}
+            raw = {name: bytes(part) for name, part in zip(entry_names, parts[1:]) if name and len(part)}
+            if lazy:
+                yield LazyProfile(flat, raw, entry_layouts)
+            elif trusted:
+                yield LazyProfile(flat, raw, entry_layouts).to_profile()
+            else:
+                for name, data in raw.items():
+                    flat[name] = [dict(zip(entry_layouts[name], item)) for item in json.loads(data)]
+                yield PersonProfile.model_validate(flat)
+    finally:
+        if owned:
+            f.close()
@@ -0,0 +1,124 @@
+from functools import lru_cache
+from typing import List, Tuple
+import logging
+import re
+
+# Source boundaries written by TavilySearcher.search
+SOURCE_BOUNDARY = re.compile(r'\n(?=Content from \S+:\n)')
+_PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # tiktoken downloads its BPE tables on first use, so load lazily and tolerate failure
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.info(f"tiktoken unavailable, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count for the model; falls back to ~4 characters per token without tiktoken."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _split_by_chars(text: str, max_tokens: int) -> List[str]:
+    """``_split_oversized`` without tiktoken, where a token is estimated as 4 characters."""
+    pieces = []
+    max_chars = max_tokens * 4
+    while count_tokens(text) > max_tokens:
+        cut = max(text.rfind('\n', 0, max_chars), text.rfind('. ', 0, max_chars))
+        if cut <= 0:
+            cut = max_chars - 1
+        pieces.append(text[:cut + 1].strip())
+        text = text[cut + 1:]
+    if text.strip():
+        pieces.append(text.strip())
+    return pieces
+
+
+def _preferred_cut(encoding, tokens: List[int], start: int, end: int) -> int:
+    """Index after the last line or sentence end in the back half of ``tokens[start:end]``, else ``end``."""
+    for i in range(end - 1, start + (end - start) // 2, -1):
+        token = encoding.decode_single_token_bytes(tokens[i])
+        if b'\n' in token or token.rstrip().endswith(b'.'):
+            return i + 1
+    return end
+
+
+def _decode_window(encoding, tokens: List[int], start: int, end: int) -> Tuple[str, int]:
+    """Decode ``tokens[start:end]``, moving ``end`` back so no character is split in two."""
+    for cut in range(end, max(start, end - 4), -1):
+        try:
+            return encoding.decode_bytes(tokens[start:cut]).decode('utf-8'), cut
+        except UnicodeDecodeError:
+            continue
+    return encoding.decode(tokens[start:end]), end
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Split a single paragraph that does not fit in one chunk, preferring line and sentence ends.
+
+    The text is encoded once and cut by token index, so every piece fits
+    ``max_tokens`` whatever its characters-per-token ratio (CJK, code).
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return _split_by_chars(text, max_tokens)
+
+    tokens = encoding.encode(text, disallowed_special=())
+    pieces = []
+    start = 0
+    while start < len(tokens):
+        end = min(start + max_tokens, len(tokens))
+        if end < len(tokens):
+            end = _preferred_cut(encoding, tokens, start, end)
+        piece, end = _decode_window(encoding, tokens, start, end)
+        # Re-encoding a decoded window can merge differently at its edges
+        while end - start > 1 and count_tokens(piece.strip()) > max_tokens:
+            piece, end = _decode_window(encoding, tokens, start, end - 1)
+        if piece.strip():
+            pieces.append(piece.strip())
+        start = end
+    return pieces
+
+
+def split_into_chunks(content: str, chunk_tokens: int = 1500, max_total_tokens: int = 12000) -> List[str]:
+    """Split ``content`` into chunks of at most ``chunk_tokens`` tokens.
+
+    Chunks are packed along source and paragraph boundaries. Content beyond
+    ``max_total_tokens`` is dropped.
+    """
+    paragraphs = []
+    for source in SOURCE_BOUNDARY.split(content):
+        for paragraph in _PARAGRAPH_BOUNDARY.split(source):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if count_tokens(paragraph) > chunk_tokens:
+                paragraphs.extend(_split_oversized(paragraph, chunk_tokens))
+            else:
+                paragraphs.append(paragraph)
+
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    total_tokens = 0
+    for paragraph in paragraphs:
+        tokens = count_tokens(paragraph)
+        if total_tokens + tokens > max_total_tokens:
+            break
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append('\n\n'.join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += tokens
+        total_tokens += tokens
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
@@ -0,0 +1,97 @@
+"""Normalization of the free-form dates models return ("March 2024", "Q3 2023").
+
+``parse_date`` maps a string to the first day of the period it names plus a
+precision marker, so dates of mixed precision sort together. Results are
+memoized, since the same strings recur across events, profiles and reruns.
+"""
+from datetime import date
+from functools import lru_cache
+from typing import Optional, Tuple
+import re
+
+DAY = 'day'
+MONTH = 'month'
+QUARTER = 'quarter'
+YEAR = 'year'
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+SEASONS = {'winter': 1, 'spring': 4, 'summer': 7, 'fall': 10, 'autumn': 10}
+
+_YEAR = r"((?:19|20)\d{2})"
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+
+# (precision, pattern, group names), tried in order from most to least precise
+_PATTERNS = [
+    (DAY, re.compile(rf"\b{_YEAR}[-/.](\d{{1,2}})[-/.](\d{{1,2}})(?!\d)"), ('y', 'm', 'd')),
+    (DAY, re.compile(rf"\b{_MONTH}\s+{_DAY},?\s+{_YEAR}\b"), ('mon', 'd', 'y')),
+    (DAY, re.compile(rf"\b{_DAY}\s+(?:of\s+)?{_MONTH},?\s+{_YEAR}\b"), ('d', 'mon', 'y')),
+    (DAY, re.compile(rf"\b(\d{{1,2}})/(\d{{1,2}})/{_YEAR}\b"), ('m', 'd', 'y')),
+    (MONTH, re.compile(rf"\b{_YEAR}[-/.](\d{{1,2}})(?!\d|[-/.]\d)"), ('y', 'm')),
+    (MONTH, re.compile(rf"\b{_MONTH},?\s+{_YEAR}\b"), ('mon', 'y')),
+    (MONTH, re.compile(rf"\b(\d{{1,2}})/{_YEAR}\b"), ('m', 'y')),
+    (QUARTER, re.compile(rf"\bq([1-4])\s*(?:of\s+)?'?{_YEAR}\b"), ('q', 'y')),
+    (QUARTER, re.compile(rf"\b{_YEAR}\s*-?\s*q([1-4])\b"), ('y', 'q')),
+    (QUARTER, re.compile(rf"\b(winter|spring|summer|fall|autumn)\s+(?:of\s+)?{_YEAR}\b"), ('season', 'y')),
+    (YEAR, re.compile(rf"\b{_YEAR}\b"), ('y',)),
+]
+
+
+def _build(kind: str, names: Tuple[str, ...], groups: Tuple[str, ...]) -> Optional[Tuple[date, str]]:
+    parts = dict(zip(names, groups))
+    year = int(parts['y'])
+    if 'mon' in parts:
+        month = MONTHS[parts['mon'][:3]]
+    elif 'q' in parts:
+        month = (int(parts['q']) - 1) * 3 + 1
+    elif 'season' in parts:
+        month = SEASONS[parts['season']]
+    else:
+        month = int(parts.get('m', 1))
+    try:
+        return date(year, month, int(parts.get('d', 1))), kind
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def _parse(text: str) -> Optional[Tuple[date, str]]:
+    for kind, pattern, names in _PATTERNS:
+        for match in pattern.finditer(text):
+            parsed = _build(kind, names, match.groups())
+            if parsed is not None:
+                return parsed
+    return None
+
+
+def parse_date(value: Optional[str]) -> Optional[Tuple[date, str]]:
+    """``(first day of the period, precision)`` for a free-form date, or None if there is no year in it."""
+    if not value:
+        return None
+    return _parse(' '.join(value.lower().split()))
+
+
+def format_date(value: date, precision: str) -> str:
+    """Canonical text for a normalized date, at its precision ("2024-03", "2023-Q3")."""
+    if precision == DAY:
+        return value.isoformat()
+    if precision == MONTH:
+        return f"{value.year}-{value.month:02d}"
+    if precision == QUARTER:
+        return f"{value.year}-Q{(value.month - 1) // 3 + 1}"
+    return str(value.year)
+
+
+def period_end(start: date, precision: str) -> date:
+    """Last day of the period that starts on ``start``."""
+    if precision == DAY:
+        return start
+    if precision == YEAR:
+        return date(start.year, 12, 31)
+    months = 1 if precision == MONTH else 3
+    month = start.month + months
+    following = date(start.year + (month - 1) // 12, (month - 1) % 12 + 1, 1)
+    return date.fromordinal(following.toordinal() - 1)
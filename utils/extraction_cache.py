@@ -0,0 +1,68 @@
+from typing import Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from models.profile_models import PersonProfile
+
+
+def schema_fingerprint() -> str:
+    """Hash of the PersonProfile JSON schema; changes whenever the model does."""
+    schema = json.dumps(PersonProfile.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode('utf-8')).hexdigest()[:16]
+
+
+class ExtractionCache:
+    """Persistent cache of validated extraction results.
+
+    Keys hash the exact prompt inputs together with the model name, prompt
+    template version and PersonProfile schema, so editing the prompt or the
+    schema invalidates old results automatically. Entries written under a
+    different version are dropped when the cache is opened.
+    """
+
+    def __init__(self, path: str, prompt_version: str):
+        self.version = f"{prompt_version}:{schema_fingerprint()}"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("DELETE FROM extractions WHERE version != ?", (self.version,))
+        self._conn.commit()
+
+    def key(self, content: str, query: str, model: str) -> str:
+        h = hashlib.sha256()
+        for part in (self.version, model, ' '.join(query.lower().split()), content.strip()):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[PersonProfile]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT profile FROM extractions WHERE key = ? AND version = ?",
+                (key, self.version)
+            ).fetchone()
+        if row is None:
+            return None
+        return PersonProfile.model_validate_json(row[0])
+
+    def put(self, key: str, profile: PersonProfile):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?)",
+                (key, self.version, profile.model_dump_json(), time.time())
+            )
+            self._conn.commit()
@@ -1,21 +1,37 @@
 import instructor
-from openai import OpenAI
-from models.profile_models import PersonProfile
-from typing import Dict, Any, Union
+from openai import OpenAI, DefaultHttpxClient
+from models.profile_models import PersonProfile, PROFILE_SECTIONS
+from utils.extraction_cache import ExtractionCache
+from utils.chunker import split_into_chunks, count_tokens
+from utils.preprocess import select_passages
+from utils.merge import merge_profiles
+from utils.structured import profile_from_structured
+from utils.ratelimit import RateLimiter
+from utils import metrics, ratelimit
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, ValidationError
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Type, Union
+import json
+import logging
+import re
+import threading
 
-class ProfileExtractor:
-    def __init__(self, api_key: str):
-        self.client = instructor.from_openai(OpenAI(api_key=api_key))
+# Completion tokens reserved against the rate limit for each call
+COMPLETION_TOKENS_ESTIMATE = 1000
 
-    def extract_profile(self, data: Dict[str, Any], query: str) -> PersonProfile:
-        prompt = f"""
-        Based on the following content about {query}, extract detailed information about the person.
-        Include any available information about work experience, educational background, achievements, and interesting facts.
-        If certain information is not available, skip those fields.
-        
-        Content: {data['content'][:6000]}  # Limiting content length for API
-        
-        Focus on extracting:
+# Fields that make a section's model call redundant once a page's structured data fills them all;
+# sections not listed always go to the model
+STRUCTURED_COVERAGE = {
+    'identity': ('full_name', 'current_role', 'company'),
+}
+
+# Bump whenever the extraction prompt changes so cached results are invalidated
+PROMPT_VERSION = "2"
+
+# What to ask for in each section's prompt; 'profile' is the whole schema in one call
+SECTION_FOCUS = {
+    'profile': """
         1. Basic information (name, current role, location)
         2. Professional background
         3. Educational history
@@ -25,72 +41,324 @@ class ProfileExtractor:
         7. Achievements
         8. Interesting facts
         9. Key topics they focus on
-        10. Professional network
+        10. Professional network""",
+    'identity': """
+        1. Basic information (name, headline, current role, company, location)
+        2. Social media profiles and websites
+        3. Languages spoken""",
+    'career': """
+        1. Work experience
+        2. Educational history
+        3. Skills, expertise and certifications
+        4. Professional organizations and collaborations""",
+    'content': """
+        1. Publications or content
+        2. Speaking engagements
+        3. Achievements and awards
+        4. Interests, key topics they focus on and interesting facts""",
+    'events': """
+        1. Significant events in their career or life
+        2. Recent events or activities
+        3. Scheduled future events or announced plans
+        4. The date of their most recent known activity""",
+}
+
+# Words that make a chunk worth sending to a section; chunks with none of them are not sent to it.
+# Sections not listed (identity, and the single-call profile) see every chunk
+SECTION_KEYWORDS = {
+    'career': re.compile(
+        r'\b(?:work(?:s|ed|ing)?|join(?:s|ed)?|experience|role|position|employ\w*|engineer\w*|manag\w*|'
+        r'director|founde?\w*|ceo|cto|cfo|head|lead\w*|universit\w*|college|school|degree|phd|mba|'
+        r'bachelor\w*|master\w*|graduat\w*|stud(?:y|ied|ies)|skill\w*|expert\w*|certifi\w*|member\w*|'
+        r'board|partner\w*|collaborat\w*)\b', re.IGNORECASE),
+    'content': re.compile(
+        r'\b(?:publish\w*|publication\w*|author\w*|wr[io]te|writ\w*|article\w*|blog\w*|book\w*|paper\w*|'
+        r'podcast\w*|talks?|speak\w*|keynote\w*|conference\w*|panel\w*|award\w*|prize\w*|honou?r\w*|'
+        r'recogni[sz]\w*|interest\w*|topics?|focus\w*|passion\w*)\b', re.IGNORECASE),
+    'events': re.compile(
+        r'\b(?:(?:19|20)\d{2}|jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|'
+        r'sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?|today|yesterday|recent\w*|upcoming|'
+        r'announc\w*|launch\w*|event\w*|joined|left|promoted|appointed|raised|acquired|will)\b',
+        re.IGNORECASE),
+}
+
+class ExtractionCancelled(Exception):
+    """Raised inside a section extraction whose caller no longer wants the result."""
+
+
+def parse_section_models(spec: Optional[str]) -> Dict[str, str]:
+    """Parse a routing spec like ``"identity=gpt-4o-mini,events=gpt-4o-mini"``."""
+    routes = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        section, _, model = item.partition('=')
+        section, model = section.strip(), model.strip()
+        if section not in PROFILE_SECTIONS or not model:
+            raise ValueError(f"Invalid section model route: {item.strip()!r}")
+        routes[section] = model
+    return routes
+
+def _drop_none(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _drop_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_none(v) for v in value if v is not None]
+    return value
+
+def _as_profile(section: BaseModel) -> PersonProfile:
+    return section if isinstance(section, PersonProfile) else PersonProfile(**dict(section))
+
+@lru_cache(maxsize=None)
+def _schema_tokens(response_model: Type[BaseModel]) -> int:
+    """Prompt tokens taken by the tool definition instructor sends alongside the messages."""
+    return count_tokens(json.dumps(response_model.model_json_schema()))
+
+def _partial_to_model(response_model: Type[BaseModel], partial) -> Optional[BaseModel]:
+    """Convert an instructor partial object into ``response_model``, or None if it is not yet valid."""
+    try:
+        return response_model.model_validate(_drop_none(partial.model_dump()))
+    except ValidationError:
+        return None
+
+class ProfileExtractor:
+    def __init__(self, api_key: str, model: str = "gpt-4", cache: Optional[ExtractionCache] = None,
+                 chunk_tokens: int = 1500, max_content_tokens: int = 12000, max_parallel_chunks: int = 4,
+                 preprocess: bool = True, split_sections: bool = True,
+                 section_models: Optional[Dict[str, str]] = None,
+                 limiter: Optional[RateLimiter] = None, min_text_tokens: int = 100):
+        # Shared with every other extractor in the process; it owns retries, so the client does not retry
+        self.limiter = limiter or ratelimit.limiter('openai')
+        http_client = DefaultHttpxClient(event_hooks={'response': [self.limiter.observe_httpx]})
+        self.client = instructor.from_openai(OpenAI(api_key=api_key, max_retries=0, http_client=http_client))
+        self.client.on("completion:response", self._record_usage)
+        self.client.on("parse:error", lambda error: metrics.incr('llm_retries', reason='parse'))
+        self.client.on("completion:error", lambda error: metrics.incr('llm_errors'))
+        self.model = model
+        self.cache = cache
+        self.chunk_tokens = chunk_tokens
+        self.max_content_tokens = max_content_tokens
+        self.preprocess = preprocess
+        self.sections: Dict[str, Type[BaseModel]] = dict(PROFILE_SECTIONS) if split_sections else {'profile': PersonProfile}
+        self.section_models = dict(section_models or {})
+        self.min_text_tokens = min_text_tokens
+        self.executor = ThreadPoolExecutor(max_workers=max_parallel_chunks * len(self.sections),
+                                           thread_name_prefix='extract')
+
+    def model_for(self, section: str) -> str:
+        return self.section_models.get(section, self.model)
+
+    def _record_usage(self, response):
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            model = getattr(response, 'model', None) or self.model
+            metrics.record_llm_usage(model, usage.prompt_tokens, usage.completion_tokens)
+
+    def extract_profile(self, data: Dict[str, Any], query: str,
+                        on_partial: Optional[Callable[[PersonProfile], None]] = None,
+                        cancel: Optional[threading.Event] = None) -> PersonProfile:
+        """Extract a profile from a data source.
+
+        Content is first reduced to the passages most relevant to ``query``
+        (deduplicated, boilerplate stripped), then split into token-bounded
+        chunks along source and paragraph boundaries. Each chunk is extracted
+        once per profile section (identity, career, content, events), each
+        with its own model and all in parallel, and the results are merged.
+        Every call repeats its chunk in the prompt, so a chunk only goes to
+        the sections whose SECTION_KEYWORDS it mentions; identity sees all of
+        them. Prompt tokens per section are recorded as
+        ``llm_section_prompt_tokens``.
+        If ``on_partial`` is given, the model output is streamed and the
+        callback receives the partially filled profile as fields arrive.
+
+        Scraped pages may carry structured data (JSON-LD, OpenGraph, h-card)
+        describing the person. It is used as-is and takes precedence over
+        model output. Sections whose STRUCTURED_COVERAGE fields it fills are
+        not sent to the model. No model call is made at all when the page
+        has under ``min_text_tokens`` tokens of text.
+
+        Setting ``cancel`` stops streaming sections and skips ones not yet
+        started; the profile is then built from whatever had completed.
+        """
+        content = data['content']
+        sections = list(self.sections)
+        structured = profile_from_structured(data['structured_data'], query) if data.get('structured_data') else None
+        if structured is not None:
+            metrics.incr('structured_data', result='used')
+            if count_tokens(content) < self.min_text_tokens:
+                sections = []
+            else:
+                sections = [s for s in sections if s not in STRUCTURED_COVERAGE or not all(
+                    getattr(structured, f) for f in STRUCTURED_COVERAGE[s])]
+            for section in self.sections:
+                if section not in sections:
+                    metrics.incr('llm_sections_skipped', section=section)
+            if not sections:
+                structured.data_sources = list(data.get('urls', []))
+                return structured
+        elif not content.strip():
+            # Structured data about someone else, and no text to extract from
+            return PersonProfile(data_sources=list(data.get('urls', [])))
+
+        if self.preprocess:
+            selected = select_passages(content, query, self.max_content_tokens)
+            logging.info(
+                f"Preprocessing for {query} saved {selected.tokens_saved} of {selected.tokens_before} tokens "
+                f"({selected.duplicates_removed} duplicate, {selected.boilerplate_removed} boilerplate passages)"
+            )
+            if selected.content:
+                content = selected.content
+            metrics.observe('content_tokens_saved', selected.tokens_saved)
+        metrics.observe('content_tokens', count_tokens(content))
+
+        chunks = split_into_chunks(content, self.chunk_tokens, self.max_content_tokens) or ['']
+        tasks = []
+        for chunk in chunks:
+            for section in sections:
+                if section in SECTION_KEYWORDS and not SECTION_KEYWORDS[section].search(chunk):
+                    metrics.incr('llm_chunks_skipped', section=section)
+                else:
+                    tasks.append((chunk, section))
+        baseline = [structured] if structured is not None else []
+        if not tasks and not baseline:
+            return PersonProfile(data_sources=list(data.get('urls', [])))
+
+        callbacks = [None] * len(tasks)
+        if on_partial:
+            latest: Dict[int, PersonProfile] = {}
+            lock = threading.Lock()
+
+            def report(index: int, profile: PersonProfile):
+                with lock:
+                    latest[index] = profile
+                    snapshot = baseline + list(latest.values())
+                on_partial(snapshot[0] if len(snapshot) == 1 else self.merge_profiles(snapshot))
+
+            callbacks = [lambda profile, i=i: report(i, profile) for i in range(len(tasks))]
+
+        if len(tasks) == 1 and not baseline:
+            try:
+                profile = self._extract_section(tasks[0][0], query, tasks[0][1], callbacks[0], cancel)
+            except ExtractionCancelled:
+                profile = PersonProfile()
+            profile.data_sources = list(data.get('urls', []))
+            return profile
+
+        futures = [
+            metrics.submit(self.executor, self._extract_section, chunk, query, section, callback, cancel)
+            for (chunk, section), callback in zip(tasks, callbacks)
+        ]
+        profiles, errors = [], []
+        for future in futures:
+            try:
+                profiles.append(future.result())
+            except ExtractionCancelled:
+                continue
+            except Exception as e:
+                errors.append(e)
+
+        # A failed chunk or section only loses its own fields unless everything failed
+        if not profiles and not baseline and errors:
+            raise errors[0]
+        if errors:
+            logging.error(f"{len(errors)} of {len(tasks)} extraction calls failed for {query}: {str(errors[0])}")
+        profile = self.merge_profiles(baseline + profiles)
+        profile.data_sources = list(data.get('urls', []))
+        return profile
+
+    def _extract_section(self, content: str, query: str, section: str,
+                         on_partial: Optional[Callable[[PersonProfile], None]] = None,
+                         cancel: Optional[threading.Event] = None) -> PersonProfile:
+        """Extract one section of the profile from one chunk, returned as a sparse PersonProfile."""
+        if cancel is not None and cancel.is_set():
+            raise ExtractionCancelled(section)
+        model = self.model_for(section)
+        cache_key = self.cache.key(content, query, f"{model}:{section}") if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                metrics.incr('extraction_cache', result='hit')
+                return cached
+            metrics.incr('extraction_cache', result='miss')
+
+        prompt = f"""
+        Based on the following content about {query}, extract detailed information about the person.
+        If certain information is not available, skip those fields.
+        
+        Content: {content}
+        
+        Focus on extracting:{SECTION_FOCUS[section]}
 
         Be conservative with extractions - only include information that is clearly stated or strongly implied in the source material.
         """
 
+        metrics.incr('llm_section_prompt_tokens',
+                     count_tokens(prompt) + _schema_tokens(self.sections[section]), section=section)
         try:
-            profile = self.client.chat.completions.create(
-                model="gpt-4",
-                response_model=PersonProfile,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            with metrics.span('llm'):
+                result = self._complete(
+                    prompt, self.sections[section], model,
+                    (lambda partial: on_partial(_as_profile(partial))) if on_partial else None,
+                    cancel
+                )
+            if result is None:
+                raise ExtractionCancelled(section)
+            metrics.incr('llm_sections', section=section, model=model)
+            profile = _as_profile(result)
             
-            # Add data sources
-            profile.data_sources = data.get('urls', [])
+            if cache_key:
+                self.cache.put(cache_key, profile)
             
             return profile
             
+        except ExtractionCancelled:
+            raise
         except Exception as e:
-            raise Exception(f"Error extracting profile: {str(e)}")
+            raise Exception(f"Error extracting {section} section: {str(e)}")
+
+    def _complete(self, prompt: str, response_model: Type[BaseModel], model: str,
+                  on_partial: Optional[Callable[[BaseModel], None]] = None,
+                  cancel: Optional[threading.Event] = None) -> Optional[BaseModel]:
+        """Run one completion; returns None if ``cancel`` was set while streaming."""
+        messages = [
+            {"role": "user", "content": prompt}
+        ]
+        prompt_tokens = count_tokens(prompt) + _schema_tokens(response_model)
+        tokens = prompt_tokens + COMPLETION_TOKENS_ESTIMATE
+        if on_partial is None:
+            return self.limiter.call(
+                self.client.chat.completions.create,
+                tokens=tokens,
+                model=model,
+                response_model=response_model,
+                messages=messages
+            )
+
+        def stream() -> Optional[BaseModel]:
+            latest = None
+            for partial in self.client.chat.completions.create_partial(
+                model=model,
+                response_model=response_model,
+                messages=messages
+            ):
+                if cancel is not None and cancel.is_set():
+                    return None
+                snapshot = _partial_to_model(response_model, partial)
+                if snapshot is not None:
+                    latest = snapshot
+                    on_partial(snapshot)
+            return latest
+
+        result = self.limiter.call(stream, tokens=tokens)
+        if result is None:
+            if cancel is not None and cancel.is_set():
+                return None
+            raise ValueError("model returned no usable output")
+
+        # Streamed responses carry no usage block, so estimate it
+        metrics.record_llm_usage(model, prompt_tokens, count_tokens(result.model_dump_json()))
+        return result
 
     def merge_profiles(self, profiles: list[PersonProfile]) -> PersonProfile:
         """Merge multiple profiles into one, combining unique information."""
-        if not profiles:
-            return PersonProfile()
-        
-        merged = profiles[0]
-        
-        for profile in profiles[1:]:
-            # Merge lists (with deduplication)
-            merged.skills = list(set(merged.skills + profile.skills))
-            merged.interests = list(set(merged.interests + profile.interests))
-            merged.achievements = list(set(merged.achievements + profile.achievements))
-            merged.certifications = list(set(merged.certifications + profile.certifications))
-            merged.languages = list(set(merged.languages + profile.languages))
-            merged.interesting_facts = list(set(merged.interesting_facts + profile.interesting_facts))
-            merged.key_topics = list(set(merged.key_topics + profile.key_topics))
-            merged.collaborations = list(set(merged.collaborations + profile.collaborations))
-            merged.organizations = list(set(merged.organizations + profile.organizations))
-            
-            # Merge social profiles
-            merged.social_profiles.update(profile.social_profiles)
-            
-            # Merge websites
-            merged.websites = list(set(merged.websites + profile.websites))
-            
-            # Merge complex objects (work experience, education, etc.)
-            merged.work_experience.extend(profile.work_experience)
-            merged.education.extend(profile.education)
-            merged.publications.extend(profile.publications)
-            merged.speaking_engagements.extend(profile.speaking_engagements)
-            
-            # Update scalar fields if they're empty in merged but present in current profile
-            if not merged.full_name and profile.full_name:
-                merged.full_name = profile.full_name
-            if not merged.professional_headline and profile.professional_headline:
-                merged.professional_headline = profile.professional_headline
-            if not merged.current_role and profile.current_role:
-                merged.current_role = profile.current_role
-            if not merged.company and profile.company:
-                merged.company = profile.company
-            if not merged.location and profile.location:
-                merged.location = profile.location
-                
-            # Merge data sources
-            merged.data_sources = list(set(merged.data_sources + profile.data_sources))
-        
-        return merged
\ No newline at end of file
+        return merge_profiles(profiles)
@@ -0,0 +1,177 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextvars import copy_context
+from typing import Callable, Deque, Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from utils.cache import SingleFlight
+import logging
+import threading
+import time
+
+
+class RobotsDisallowedError(Exception):
+    """Raised when robots.txt forbids fetching a URL."""
+
+
+class FanOutScraper:
+    """Polite concurrent scraping on top of WebScraper.
+
+    Enforces a per-domain concurrency cap and a minimum delay between
+    requests to the same domain, and honours a cached robots.txt policy per
+    host. Work waiting for its domain's turn sits in a per-domain queue and
+    only reaches the pool when it may start, so a busy or slow domain never
+    ties up workers that other domains could use; the pool size is the
+    global concurrency cap.
+    """
+
+    def __init__(self, scraper, max_concurrency: int = 8, per_domain_concurrency: int = 2,
+                 min_domain_delay: float = 1.0, respect_robots: bool = True, robots_ttl: float = 3600):
+        self.scraper = scraper
+        self.per_domain_concurrency = per_domain_concurrency
+        self.min_domain_delay = min_domain_delay
+        self.respect_robots = respect_robots
+        self.robots_ttl = robots_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='fanout')
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Tuple[Future, Callable, str, Any]]] = {}
+        self._active: Dict[str, int] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._next_request_at: Dict[str, float] = {}
+        self._robots: Dict[str, Tuple[Optional[RobotFileParser], float]] = {}
+        self._robots_flight = SingleFlight()
+
+    def _fetch_robots(self, scheme: str, domain: str) -> Optional[RobotFileParser]:
+        parser = None
+        robots_url = f"{scheme}://{domain}/robots.txt"
+        try:
+            response = self.scraper.session.get(robots_url, timeout=self.scraper.timeout)
+            if response.status_code in (401, 403):
+                parser = RobotFileParser(robots_url)
+                parser.disallow_all = True
+            elif response.ok:
+                parser = RobotFileParser(robots_url)
+                parser.parse(response.text.splitlines())
+        except Exception as e:
+            # An unreachable robots.txt is treated as allow-all
+            logging.info(f"Could not fetch {robots_url}: {str(e)}")
+
+        with self._lock:
+            self._robots[domain] = (parser, time.monotonic() + self.robots_ttl)
+        return parser
+
+    def _robots_for(self, scheme: str, domain: str) -> Optional[RobotFileParser]:
+        with self._lock:
+            cached = self._robots.get(domain)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+        # Concurrent first hits on a host share one robots.txt fetch
+        return self._robots_flight.do(domain, lambda: self._fetch_robots(scheme, domain))
+
+    def allowed(self, url: str) -> bool:
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        robots = self._robots_for(parts.scheme or 'https', parts.netloc.lower())
+        return robots is None or robots.can_fetch(self.scraper.headers['User-Agent'], url)
+
+    def submit(self, url: str, fn: Optional[Callable[[str], Any]] = None) -> Future:
+        """Queue a polite fetch of ``url`` and return its future.
+
+        ``fn(url)`` runs on the pool once robots.txt allows the URL and its
+        domain's turn comes; it defaults to ``scraper.scrape_website`` and
+        runs with the caller's context (trace, metrics labels).
+        """
+        future = Future()
+        call = (future, copy_context().run, url, fn or self.scraper.scrape_website)
+        try:
+            self.executor.submit(self._admit, call)
+        except RuntimeError as e:
+            future.set_exception(e)
+        return future
+
+    def _admit(self, call: Tuple[Future, Callable, str, Any]):
+        future, _, url, _ = call
+        if future.cancelled():
+            return
+        try:
+            if not self.allowed(url):
+                raise RobotsDisallowedError(f"robots.txt disallows {url}")
+        except Exception as e:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
+            return
+
+        domain = urlsplit(url).netloc.lower()
+        with self._lock:
+            self._queues.setdefault(domain, deque()).append(call)
+        self._dispatch(domain)
+
+    def _dispatch(self, domain: str):
+        """Start queued work for ``domain`` while its concurrency cap and delay allow."""
+        with self._lock:
+            queue = self._queues.get(domain)
+            while queue and self._active.get(domain, 0) < self.per_domain_concurrency:
+                if queue[0][0].cancelled():
+                    queue.popleft()
+                    continue
+                now = time.monotonic()
+                start = self._next_request_at.get(domain, now)
+                if start > now:
+                    # Come back when the delay has passed instead of holding a worker asleep
+                    if domain not in self._timers:
+                        timer = threading.Timer(start - now, self._wake, (domain,))
+                        timer.daemon = True
+                        self._timers[domain] = timer
+                        timer.start()
+                    return
+                call = queue.popleft()
+                self._active[domain] = self._active.get(domain, 0) + 1
+                self._next_request_at[domain] = now + self.min_domain_delay
+                try:
+                    self.executor.submit(self._run, domain, call)
+                except RuntimeError as e:
+                    # The pool was shut down
+                    self._active[domain] -= 1
+                    if call[0].set_running_or_notify_cancel():
+                        call[0].set_exception(e)
+            if not queue:
+                self._queues.pop(domain, None)
+
+    def _wake(self, domain: str):
+        with self._lock:
+            self._timers.pop(domain, None)
+        self._dispatch(domain)
+
+    def _run(self, domain: str, call: Tuple[Future, Callable, str, Any]):
+        future, run, url, fn = call
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = run(fn, url)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            with self._lock:
+                self._active[domain] -= 1
+            self._dispatch(domain)
+
+    def scrape(self, url: str) -> Dict[str, Any]:
+        """Scrape one URL within the per-domain limits, blocking until done.
+
+        Not for use from the fan-out pool itself; queue work with ``submit`` there.
+        """
+        return self.submit(url).result()
+
+    def scrape_many(self, urls: Iterable[str]) -> List[Dict[str, Any]]:
+        """Scrape ``urls`` concurrently, skipping those that fail or are disallowed."""
+        futures = [self.submit(url) for url in dict.fromkeys(urls)]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.info(f"Skipping fan-out URL: {str(e)}")
+        return results
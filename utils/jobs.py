@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import logging
+import threading
+import time
+import uuid
+
+from models.profile_models import PersonProfile
+from utils.cache import TTLCache
+from utils import metrics
+
+
+class QueueFullError(Exception):
+    """Raised when too many lookups are already queued or running."""
+
+
+class Job:
+    """One profile lookup running in the background.
+
+    ``profile`` holds the latest snapshot while the lookup runs and the final
+    merged profile once it is done, so callers can poll for progress.
+    """
+
+    def __init__(self, key: Tuple[str, str], query: str, url: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.query = query
+        self.url = url
+        self.status = 'queued'
+        self.profile: Optional[PersonProfile] = None
+        self.error: Optional[str] = None
+        self.trace: Optional[metrics.Trace] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'query': self.query,
+            'url': self.url,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'profile': self.profile.model_dump(mode='json') if self.profile is not None else None,
+        }
+
+
+class JobManager:
+    """Runs profile lookups on a worker pool and caches finished results.
+
+    Submitting a query that is already running returns the running job, and
+    one that finished within ``result_ttl`` returns the finished job, so
+    repeated submissions (page reruns, retries, several users asking for the
+    same person) never start the pipeline twice. With ``max_pending``, new
+    lookups are refused with QueueFullError once that many are queued or
+    running. ``stream=False`` skips progressive snapshots for callers that
+    only want the final profile.
+    """
+
+    def __init__(self, pipeline, max_workers: int = 4, result_ttl: float = 3600, max_jobs: int = 1024,
+                 max_pending: Optional[int] = None, stream: bool = True):
+        self.pipeline = pipeline
+        self.stream = stream
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.results = TTLCache(ttl=result_ttl, max_entries=max_jobs)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jobs')
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Job] = {}
+
+    @staticmethod
+    def key(query: str, url: Optional[str] = None) -> Tuple[str, str]:
+        return ' '.join(query.lower().split()), (url or '').strip().lower()
+
+    def submit(self, query: str, url: Optional[str] = None) -> Job:
+        key = self.key(query, url)
+        with self._lock:
+            job = self.results.get(key)
+            if job is not None and self._jobs.get(job.id) is not job:
+                # Dropped from the job table, so get() could not find it; run the lookup again
+                job = None
+            job = job or self._inflight.get(key)
+            if job is not None:
+                metrics.incr('jobs', result='cached' if job.done else 'coalesced')
+                return job
+            if self.max_pending is not None and len(self._inflight) >= self.max_pending:
+                metrics.incr('jobs', result='rejected')
+                raise QueueFullError(f"{len(self._inflight)} lookups already pending")
+
+            job = Job(key, query, url)
+            self._inflight[key] = job
+            self._jobs[job.id] = job
+            self._evict()
+        metrics.incr('jobs', result='submitted')
+        metrics.submit(self.executor, self._run, job)
+        return job
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def _evict(self):
+        # Oldest finished jobs go first; running ones are never dropped. A dropped job's
+        # cached result goes with it, so submit() never hands out an ID get() cannot find.
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            job = self._jobs[job_id]
+            if job.done:
+                del self._jobs[job_id]
+                if self.results.get(job.key) is job:
+                    self.results.pop(job.key)
+
+    def _run(self, job: Job):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            with metrics.trace() as trace:
+                job.trace = trace
+                if self.stream:
+                    for profile in self.pipeline.iter_updates(job.query, job.url):
+                        job.profile = profile
+                else:
+                    job.profile = self.pipeline.run(job.query, job.url)
+            job.status = 'done'
+            self.results.set(job.key, job)
+        except Exception as e:
+            logging.error(f"Error profiling {job.query}: {str(e)}")
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._inflight.pop(job.key, None)
+            job._done.set()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,139 @@
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Type, get_args, get_origin
+
+from pydantic import BaseModel
+
+from models.profile_models import PersonProfile, WorkExperience, Education, Publication, Event
+from utils.dates import parse_date, format_date
+
+# Fields that identify the same entry across sources
+ENTRY_KEYS: Dict[Type[BaseModel], Tuple[str, ...]] = {
+    WorkExperience: ('title', 'company'),
+    Education: ('degree', 'institution'),
+    Publication: ('title',),
+    Event: ('title', 'date'),
+}
+
+
+def normalize(value: Any) -> str:
+    """Case- and whitespace-insensitive form used for deduplication keys.
+
+    Punctuation is kept: "C", "C++" and "C#" are different skills.
+    """
+    if value is None:
+        return ''
+    return ' '.join(str(value).casefold().split())
+
+
+def _date_key(value: Any) -> str:
+    """The period a date names, so "March 2024" and "2024-03" match; otherwise the text itself."""
+    parsed = parse_date(value) if isinstance(value, str) else None
+    return format_date(*parsed) if parsed else normalize(value)
+
+
+# Key functions for identifying fields whose wording varies more than their meaning
+_KEY_FUNCTIONS: Dict[str, Callable[[Any], str]] = {'date': _date_key}
+
+
+def _entry_key(entry: BaseModel) -> tuple:
+    fields = ENTRY_KEYS.get(type(entry))
+    if fields is None:
+        fields = tuple(type(entry).model_fields)
+    key = tuple(_KEY_FUNCTIONS.get(name, normalize)(getattr(entry, name)) for name in fields)
+    if not any(key):
+        # Nothing identifying; fall back to the whole entry
+        key = tuple(normalize(v) for v in entry.model_dump().values())
+    return key
+
+
+def _fill(target: Dict[str, Any], entry: BaseModel):
+    """Fill gaps in ``target`` from ``entry`` and union its string lists."""
+    for name, value in entry:
+        if isinstance(value, list):
+            _extend_unique(target[name], value, {normalize(v) for v in target[name]})
+        elif not target.get(name) and value:
+            target[name] = value
+
+
+def _extend_unique(target: List[Any], values: Iterable[Any], seen: set):
+    for value in values:
+        key = normalize(value)
+        if key and key not in seen:
+            seen.add(key)
+            target.append(value)
+
+
+def _classify(annotation) -> str:
+    origin = get_origin(annotation)
+    if origin is list:
+        (item,) = get_args(annotation)
+        return 'entries' if isinstance(item, type) and issubclass(item, BaseModel) else 'strings'
+    if origin is dict:
+        return 'mapping'
+    return 'scalar'
+
+
+_FIELD_KINDS: Dict[Type[BaseModel], Dict[str, str]] = {}
+
+
+def _field_kinds(cls: Type[BaseModel]) -> Dict[str, str]:
+    if cls not in _FIELD_KINDS:
+        _FIELD_KINDS[cls] = {name: _classify(field.annotation) for name, field in cls.model_fields.items()}
+    return _FIELD_KINDS[cls]
+
+
+def merge_profiles(profiles: Iterable[PersonProfile]) -> PersonProfile:
+    """Fold any number of profiles into one in a single pass.
+
+    Scalars keep the first non-empty value, string lists are deduplicated
+    ignoring case and whitespace, dictionaries keep the first value per key, and
+    structured entries (jobs, degrees, publications, events) are matched on
+    normalized identifying fields, with later sources filling gaps in earlier
+    ones. First-seen order is preserved and the inputs are not modified.
+    last_known_activity_date is moved up to the latest past event.
+    """
+    kinds = _field_kinds(PersonProfile)
+    merged: Dict[str, Any] = {}
+    seen: Dict[str, set] = {}
+    entries: Dict[str, Dict[tuple, Dict[str, Any]]] = {}
+    entry_types: Dict[str, Callable] = {}
+
+    for name, kind in kinds.items():
+        if kind == 'strings':
+            merged[name], seen[name] = [], set()
+        elif kind == 'mapping':
+            merged[name] = {}
+        elif kind == 'entries':
+            entries[name] = {}
+        else:
+            merged[name] = None
+
+    for profile in profiles:
+        for name, kind in kinds.items():
+            value = getattr(profile, name)
+            if not value:
+                continue
+            if kind == 'scalar':
+                if not merged[name]:
+                    merged[name] = value
+            elif kind == 'strings':
+                _extend_unique(merged[name], value, seen[name])
+            elif kind == 'mapping':
+                for key, item in value.items():
+                    merged[name].setdefault(key, item)
+            else:
+                by_key = entries[name]
+                for entry in value:
+                    key = _entry_key(entry)
+                    if key in by_key:
+                        _fill(by_key[key], entry)
+                    else:
+                        entry_types[name] = type(entry)
+                        by_key[key] = entry.model_dump()
+
+    for name, by_key in entries.items():
+        cls = entry_types.get(name)
+        merged[name] = [cls.model_construct(**data) for data in by_key.values()] if cls else []
+
+    profile = PersonProfile(**merged)
+    profile.update_activity_date()
+    return profile
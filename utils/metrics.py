@@ -0,0 +1,235 @@
+"""Process-wide latency, token and cost metrics.
+
+Stages are timed with ``span``; counters and value observations are
+recorded with ``incr`` and ``observe``. Everything is aggregated into the
+global ``REGISTRY`` (exportable as Prometheus text or JSON) and, when a
+``trace()`` is active, also into a per-query trace for debugging one lookup.
+Work handed to thread pools must go through ``submit`` so it stays attached
+to the caller's trace.
+"""
+from collections import deque
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import json
+import threading
+import time
+
+# USD per 1K tokens (prompt, completion)
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+}
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _quantile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    # Dated snapshots such as gpt-4o-2024-08-06 are priced like their family
+    family = max((m for m in MODEL_PRICES if model.startswith(m)), key=len, default=None)
+    if family is None:
+        return 0.0
+    prompt_price, completion_price = MODEL_PRICES[family]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def _escape_label(value: Any) -> str:
+    """Label value escaped per the Prometheus text format: backslash, double quote and newline."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    """Thread-safe store of counters and observation summaries."""
+
+    def __init__(self, reservoir_size: int = 2048):
+        self.reservoir_size = reservoir_size
+        self._lock = threading.Lock()
+        self._counters: Dict[LabelKey, float] = {}
+        self._observations: Dict[LabelKey, Dict[str, Any]] = {}
+
+    def incr(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._observations.get(key)
+            if summary is None:
+                summary = self._observations[key] = {
+                    'count': 0, 'sum': 0.0, 'max': 0.0,
+                    'recent': deque(maxlen=self.reservoir_size),
+                }
+            summary['count'] += 1
+            summary['sum'] += value
+            summary['max'] = max(summary['max'], value)
+            summary['recent'].append(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+            observations = []
+            for (name, labels), summary in self._observations.items():
+                recent = list(summary['recent'])
+                observations.append({
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': summary['count'],
+                    'sum': summary['sum'],
+                    'max': summary['max'],
+                    'p50': _quantile(recent, 0.5),
+                    'p95': _quantile(recent, 0.95),
+                    'p99': _quantile(recent, 0.99),
+                })
+        return {'counters': counters, 'observations': observations}
+
+    def to_prometheus(self, prefix: str = 'profiler') -> str:
+        def fmt(labels: Dict[str, str], **extra) -> str:
+            items = {**labels, **extra}
+            if not items:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in sorted(items.items())) + '}'
+
+        data = self.to_dict()
+        lines: List[str] = []
+        typed = set()
+        for counter in data['counters']:
+            metric = f"{prefix}_{counter['name']}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{fmt(counter['labels'])} {counter['value']}")
+        for obs in data['observations']:
+            metric = f"{prefix}_{obs['name']}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} summary")
+            for q in ('p50', 'p95', 'p99'):
+                quantile = f"0.{q[1:]}"
+                lines.append(f"{metric}{fmt(obs['labels'], quantile=quantile)} {obs[q]}")
+            lines.append(f"{metric}_sum{fmt(obs['labels'])} {obs['sum']}")
+            lines.append(f"{metric}_count{fmt(obs['labels'])} {obs['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Write a snapshot; ``.prom`` files get Prometheus text, anything else JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+class Trace:
+    """Metrics for a single query, for the debug view."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, stage: str, start: float, duration: float, ok: bool):
+        with self._lock:
+            self.spans.append({
+                'stage': stage,
+                'start_s': round(start - self.started, 3),
+                'duration_s': round(duration, 3),
+                'ok': ok,
+            })
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage_totals(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span['stage']] = totals.get(span['stage'], 0) + span['duration_s']
+        return totals
+
+
+REGISTRY = Registry()
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('profiler_trace', default=None)
+
+
+def _counter_name(name: str, labels: Dict[str, Any]) -> str:
+    return name + ''.join(f".{v}" for _, v in sorted(labels.items()))
+
+
+def incr(name: str, value: float = 1, **labels):
+    REGISTRY.incr(name, value, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.incr(_counter_name(name, labels), value)
+
+
+def observe(name: str, value: float, **labels):
+    REGISTRY.observe(name, value, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.incr(_counter_name(name, labels), value)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a pipeline stage."""
+    start = time.monotonic()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        duration = time.monotonic() - start
+        REGISTRY.observe('stage_seconds', duration, stage=stage)
+        if not ok:
+            REGISTRY.incr('stage_errors', stage=stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(stage, start, duration, ok)
+
+
+def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int):
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    incr('llm_prompt_tokens', prompt_tokens, model=model)
+    incr('llm_completion_tokens', completion_tokens, model=model)
+    incr('llm_cost_usd', cost, model=model)
+    incr('llm_calls', model=model)
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    """Collect a per-query trace for everything run in this context."""
+    current = Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+def submit(executor: Executor, fn, *args) -> Future:
+    """``executor.submit`` that carries the caller's trace into the worker thread."""
+    return executor.submit(copy_context().run, fn, *args)
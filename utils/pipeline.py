@@ -0,0 +1,345 @@
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from functools import partial
+from typing import Dict, Any, Callable, List, Iterator, Optional, Tuple
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+
+import validators
+
+from models.profile_models import PersonProfile
+from utils.fanout import FanOutScraper
+from utils.profile_store import ProfileStore, SourceRecord, content_fingerprint
+from utils import metrics
+
+
+class ProfilePipeline:
+    """Runs scrape, search and per-source extraction concurrently.
+
+    Scraping and searching start together; each source is handed to the
+    extractor as soon as it arrives, so a profile is ready in roughly the
+    time of the slowest branch instead of the sum of all network calls.
+
+    With a ``store``, every lookup is saved together with a fingerprint per
+    source (the scraped URL, each search result page, each fan-out page),
+    and the next lookup for the same prospect only re-extracts sources
+    whose content changed.
+    """
+
+    def __init__(self, scraper, searcher, extractor, max_workers: int = 4,
+                 scrape_timeout: float = 15, search_timeout: float = 30,
+                 extract_timeout: float = 120, fanout: Optional[FanOutScraper] = None,
+                 fanout_top_n: int = 3, fanout_timeout: float = 30,
+                 store: Optional[ProfileStore] = None):
+        self.scraper = scraper
+        self.searcher = searcher
+        self.extractor = extractor
+        self.fanout = fanout
+        self.fanout_top_n = fanout_top_n
+        self.store = store
+        self.timeouts = {
+            'scrape': scrape_timeout,
+            'search': search_timeout,
+            'extract': extract_timeout,
+            'fanout': fanout_timeout,
+        }
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='profiler')
+
+    def _scrape_source(self, url: str) -> Dict[str, Any]:
+        scraped_data = self.scraper.scrape_website(url)
+        result = {
+            'content': scraped_data['text_content'],
+            'urls': [url],
+            'social_links': scraped_data.get('social_links', {})
+        }
+        structured = scraped_data.get('structured_data') or {}
+        if any(structured.values()):
+            result['structured_data'] = structured
+        return result
+
+    @staticmethod
+    def _search_sources(result: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """One ``(source, data)`` pair per search result page.
+
+        Tavily's generated answer is left out: it is reworded on every call,
+        so it would make an unchanged set of pages look new.
+        """
+        sources = []
+        for item in (result.get('search_results') or {}).get('results', []):
+            link = item.get('url')
+            text = item.get('raw_content') or item.get('content') or ''
+            if link and text.strip():
+                sources.append((f'search:{link}', {'content': text, 'urls': [link]}))
+        return sources
+
+    @staticmethod
+    def _fingerprint(result: Dict[str, Any]) -> str:
+        content = result['content']
+        if result.get('structured_data'):
+            content += '\n' + json.dumps(result['structured_data'], sort_keys=True)
+        return content_fingerprint(content)
+
+    def _fanout_links(self, source: str, result: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """``(source, url)`` pairs worth fetching after ``result`` arrives."""
+        if source == 'search':
+            return [(f'page:{link}', link) for link in result.get('urls', [])[:self.fanout_top_n]]
+        if not source.startswith('social:'):
+            # Social profiles found on a page are fetched once; they are not expanded further
+            return [(f'social:{link}', link) for link in result.get('social_links', {}).values()]
+        return []
+
+    def _submit(self, pending: Dict[Future, Tuple[str, str, float]], stage: str, source: str, fn, *args):
+        if stage == 'fanout':
+            # Fan-out fetches are queued per domain and run on the fan-out pool when their turn comes
+            url, = args
+            future = self.fanout.submit(url, partial(self._timed, stage, fn))
+        else:
+            future = metrics.submit(self.executor, self._timed, stage, fn, *args)
+        pending[future] = (stage, source, time.monotonic() + self.timeouts[stage])
+
+    @staticmethod
+    def _timed(stage: str, fn, *args):
+        with metrics.span(stage):
+            return fn(*args)
+
+    def iter_profiles(self, query: str, url: Optional[str] = None,
+                      errors: Optional[List[Exception]] = None) -> Iterator[PersonProfile]:
+        """Yield one extracted profile per data source, in completion order.
+
+        ``url`` is scraped alongside the search; if omitted and ``query`` is itself
+        a URL, the query is scraped. Failures and timeouts are logged and skipped;
+        pass ``errors`` to collect them.
+        """
+        for _, profile in self._iter_results(query, url, errors):
+            yield profile
+
+    def _iter_results(self, query: str, url: Optional[str] = None,
+                      errors: Optional[List[Exception]] = None,
+                      on_partial: Optional[Callable[[str, PersonProfile], None]] = None,
+                      known: Optional[Dict[str, SourceRecord]] = None,
+                      fetched: Optional[Dict[str, Tuple[List[str], str, float]]] = None,
+                      stop: Optional[threading.Event] = None
+                      ) -> Iterator[Tuple[str, PersonProfile]]:
+        """Yield ``(source, profile)`` pairs, where source names the branch that produced it.
+
+        Each search result page is its own source, named ``search:<url>``.
+        When ``fetched`` is given it receives ``(urls, content_hash,
+        fetched_at)`` per source; sources whose hash matches their ``known`` record reuse the
+        stored extraction instead of calling the model. Once ``stop`` is set,
+        nothing new is submitted, queued work is cancelled and running
+        extractions stop streaming; closing the generator also cancels
+        queued work.
+        """
+        if errors is None:
+            errors = []
+        pending: Dict[Future, Tuple[str, str, float]] = {}
+
+        if not url and validators.url(query):
+            url = query
+
+        # Kick off both data-gathering branches at once
+        if url:
+            self._submit(pending, 'scrape', 'scrape', self._scrape_source, url)
+        self._submit(pending, 'search', 'search', self.searcher.search, query)
+        seen_urls = {url} if url else set()
+
+        try:
+            while pending and not (stop and stop.is_set()):
+                now = time.monotonic()
+                for future, (stage, source, deadline) in list(pending.items()):
+                    if deadline <= now and not future.done():
+                        # A running thread cannot be interrupted; its result is simply dropped
+                        future.cancel()
+                        del pending[future]
+                        logging.error(f"Timed out in {stage} stage for {query}")
+                        metrics.incr('stage_timeouts', stage=stage)
+                        errors.append(TimeoutError(f"{stage} stage timed out"))
+                if not pending:
+                    break
+
+                timeout = max(0, min(deadline for _, _, deadline in pending.values()) - now)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if stop and stop.is_set():
+                        break
+                    stage, source, _ = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if stage == 'fanout':
+                            # Extra sources are best effort (robots.txt, paywalls, binaries)
+                            logging.info(f"Skipped fan-out source {source}: {str(e)}")
+                            continue
+                        logging.error(f"Error in {stage} stage for {query}: {str(e)}")
+                        errors.append(e)
+                        continue
+
+                    if stage == 'extract':
+                        yield source, result
+                        continue
+
+                    if self.fanout:
+                        for fanout_source, link in self._fanout_links(source, result):
+                            if link not in seen_urls and validators.url(link):
+                                seen_urls.add(link)
+                                self._submit(pending, 'fanout', fanout_source, self._scrape_source, link)
+
+                    # Search results are stored and re-extracted page by page
+                    sources = self._search_sources(result) if stage == 'search' else [(source, result)]
+                    for source, data in sources:
+                        if not (data['content'] or data.get('structured_data')):
+                            continue
+                        if fetched is not None:
+                            content_hash = self._fingerprint(data)
+                            fetched[source] = (list(data['urls']), content_hash, time.time())
+                            previous = (known or {}).get(source)
+                            if previous is not None and previous.content_hash == content_hash:
+                                metrics.incr('profile_store_sources', result='unchanged')
+                                yield source, previous.profile
+                                continue
+                            metrics.incr('profile_store_sources', result='changed' if previous else 'new')
+
+                        callback = partial(on_partial, source) if on_partial else None
+                        self._submit(pending, 'extract', source, self.extractor.extract_profile,
+                                     data, query, callback, stop)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def iter_updates(self, query: str, url: Optional[str] = None,
+                     min_interval: float = 0.3) -> Iterator[PersonProfile]:
+        """Yield progressively more complete merged profiles for ``query``.
+
+        Partial structured output is streamed from the model, so snapshots
+        include fields while sources are still being extracted. Snapshots are
+        throttled to one per ``min_interval`` seconds; the last one yielded is
+        the final merged profile.
+        """
+        events: "queue.Queue[Tuple[str, Optional[str], Optional[PersonProfile]]]" = queue.Queue()
+        errors: List[Exception] = []
+        known = self.store.sources(self.store.key(query, url)) if self.store else None
+        fetched: Dict[str, Tuple[List[str], str, float]] = {}
+        stop = threading.Event()
+
+        def produce():
+            try:
+                results = self._iter_results(
+                    query, url, errors,
+                    on_partial=lambda source, profile: events.put(('partial', source, profile)),
+                    known=known, fetched=fetched if self.store else None, stop=stop
+                )
+                for source, profile in results:
+                    events.put(('done', source, profile))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                events.put(('end', None, None))
+
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(produce,), daemon=True, name='profiler-updates').start()
+
+        completed: Dict[str, PersonProfile] = {}
+        partials: Dict[str, PersonProfile] = {}
+        last_yield = 0.0
+        dirty = False
+        try:
+            while True:
+                timeout = max(0.0, min_interval - (time.monotonic() - last_yield)) if dirty else None
+                try:
+                    kind, source, profile = events.get(timeout=timeout)
+                except queue.Empty:
+                    kind = 'flush'
+
+                if kind == 'end':
+                    break
+                if kind == 'partial':
+                    partials[source] = profile
+                    dirty = True
+                elif kind == 'done':
+                    partials.pop(source, None)
+                    completed[source] = profile
+                    dirty = True
+
+                if dirty and time.monotonic() - last_yield >= min_interval:
+                    yield self.extractor.merge_profiles(list(completed.values()) + list(partials.values()))
+                    last_yield = time.monotonic()
+                    dirty = False
+        except GeneratorExit:
+            # The caller stopped listening; stop scraping, searching and extracting for it
+            stop.set()
+            raise
+
+        if not completed and errors:
+            raise errors[0]
+        with metrics.span('merge'):
+            if self.store:
+                merged = self._save(query, url, completed, known, fetched, errors)
+            else:
+                merged = self.extractor.merge_profiles(list(completed.values()))
+        yield merged
+
+    def extract_profiles(self, query: str, url: Optional[str] = None) -> List[PersonProfile]:
+        errors: List[Exception] = []
+        profiles = list(self.iter_profiles(query, url, errors))
+        if not profiles and errors:
+            raise errors[0]
+        return profiles
+
+    def run(self, query: str, url: Optional[str] = None) -> PersonProfile:
+        """Build a single merged profile for ``query``."""
+        with metrics.span('pipeline'):
+            if self.store:
+                return self.refresh(query, url)
+            profiles = self.extract_profiles(query, url)
+            with metrics.span('merge'):
+                return self.extractor.merge_profiles(profiles)
+
+    def refresh(self, query: str, url: Optional[str] = None) -> PersonProfile:
+        """Update the stored profile for ``query``, re-extracting only new or changed sources."""
+        if self.store is None:
+            raise ValueError("refresh requires a profile store")
+        errors: List[Exception] = []
+        known = self.store.sources(self.store.key(query, url))
+        fetched: Dict[str, Tuple[List[str], str, float]] = {}
+        results = dict(self._iter_results(query, url, errors, known=known, fetched=fetched))
+        if not results and errors:
+            raise errors[0]
+        with metrics.span('merge'):
+            return self._save(query, url, results, known, fetched, errors)
+
+    def _save(self, query: str, url: Optional[str], results: Dict[str, PersonProfile],
+              known: Dict[str, SourceRecord], fetched: Dict[str, Tuple[List[str], str, float]],
+              errors: List[Exception]) -> PersonProfile:
+        """Store this lookup's sources, retire the ones that dropped out, and return the merged profile."""
+        now = time.time()
+        records = {
+            source: SourceRecord(source, *fetched[source], profile)
+            for source, profile in results.items()
+        }
+        if errors:
+            # A source missing from a run that had failures may just be unreachable right now
+            for source, record in known.items():
+                records.setdefault(source, record)
+        retired = set(known) - set(records)
+        if retired:
+            metrics.incr('profile_store_sources', len(retired), result='retired')
+            logging.info(f"Retired {len(retired)} sources for {query}: {', '.join(sorted(retired))}")
+
+        merged = self.extractor.merge_profiles([record.profile for record in records.values()])
+        merged.last_updated = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.store.save(self.store.key(query, url), query, url, merged, records, now)
+        return merged
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,206 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import hashlib
+import math
+import re
+
+from utils.chunker import SOURCE_BOUNDARY, count_tokens
+
+_HEADER = re.compile(r'^Content from (\S+):\n')
+_WORD = re.compile(r'[a-z0-9]+')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+# Whole words only, so "design in" or "blog in" is not mistaken for "sign in" or "log in"
+_BOILERPLATE = re.compile(
+    r'\b(?:cookies?|privacy policy|terms of (?:use|service)|all rights reserved|sign (?:in|up)|log ?in|'
+    r'subscribe|newsletter|accept all|enable javascript|skip to (?:main )?content|share this|'
+    r'follow us|advertisements?)\b',
+    re.IGNORECASE
+)
+# Terms that tend to mark biographical passages; weighted below the queried name
+_PROFILE_TERMS = {
+    'founder', 'ceo', 'cto', 'director', 'head', 'lead', 'manager', 'engineer', 'professor',
+    'university', 'degree', 'phd', 'graduated', 'joined', 'previously', 'experience', 'role',
+    'award', 'speaker', 'keynote', 'conference', 'published', 'author', 'book', 'board', 'partner',
+}
+_STOPWORDS = {'https', 'http', 'www', 'com', 'org', 'net', 'in', 'the', 'of', 'and'}
+
+PASSAGE_WORDS = 120
+
+
+@dataclass
+class Passage:
+    source: Optional[str]
+    position: int
+    text: str
+    words: List[str]
+
+
+@dataclass
+class PreprocessResult:
+    content: str
+    tokens_before: int
+    tokens_after: int
+    duplicates_removed: int
+    boilerplate_removed: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _split_block(block: str) -> List[str]:
+    """Break an oversized block into passages of roughly PASSAGE_WORDS words."""
+    units = [line for line in block.split('\n') if line.strip()]
+    if len(units) == 1:
+        units = _SENTENCE_END.split(units[0])
+
+    passages, current, size = [], [], 0
+    for unit in units:
+        n = len(unit.split())
+        if current and size + n > PASSAGE_WORDS:
+            passages.append(' '.join(current))
+            current, size = [], 0
+        current.append(unit.strip())
+        size += n
+    if current:
+        passages.append(' '.join(current))
+    return passages
+
+
+def split_passages(content: str) -> List[Passage]:
+    passages = []
+    for section in SOURCE_BOUNDARY.split(content):
+        header = _HEADER.match(section)
+        source = header.group(1) if header else None
+        body = section[header.end():] if header else section
+
+        for block in re.split(r'\n\s*\n', body):
+            block = block.strip()
+            if not block:
+                continue
+            pieces = _split_block(block) if len(block.split()) > PASSAGE_WORDS else [block]
+            for piece in pieces:
+                passages.append(Passage(source, len(passages), piece, _words(piece)))
+    return passages
+
+
+def simhash(words: List[str], shingle: int = 3) -> int:
+    """64-bit simhash over word shingles."""
+    weights = [0] * 64
+    grams = [' '.join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))]
+    for gram in grams:
+        h = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _is_boilerplate(passage: Passage, repeats: Counter) -> bool:
+    if not passage.words:
+        return True
+    n = len(passage.words)
+    key = ' '.join(passage.words)
+    # Short passages repeated verbatim are menus, footers and banners
+    if n <= 12 and repeats[key] > 1:
+        return True
+    if n < 40 and _BOILERPLATE.search(passage.text):
+        return True
+    # Link lists: lots of separators, few words per segment
+    separators = sum(passage.text.count(c) for c in '|»·•')
+    return separators >= 3 and n / (separators + 1) < 4
+
+
+def remove_near_duplicates(passages: List[Passage], max_distance: int = 3) -> List[Passage]:
+    """Keep the first of any group of passages whose simhashes differ by at most ``max_distance`` bits.
+
+    Candidates are found through four 16-bit bands, so any pair within three
+    bits shares at least one band.
+    """
+    kept: List[Passage] = []
+    fingerprints: List[int] = []
+    bands: Dict[tuple, List[int]] = {}
+    for passage in passages:
+        fp = simhash(passage.words)
+        keys = [(band, fp >> (band * 16) & 0xFFFF) for band in range(4)]
+        candidates = {i for key in keys for i in bands.get(key, [])}
+        if any(bin(fp ^ fingerprints[i]).count('1') <= max_distance for i in candidates):
+            continue
+        for key in keys:
+            bands.setdefault(key, []).append(len(kept))
+        kept.append(passage)
+        fingerprints.append(fp)
+    return kept
+
+
+def bm25_scores(passages: List[Passage], query_weights: Dict[str, float],
+                k1: float = 1.5, b: float = 0.75) -> List[float]:
+    n = len(passages)
+    if not n:
+        return []
+    avg_len = sum(len(p.words) for p in passages) / n or 1.0
+    df = Counter(term for p in passages for term in set(p.words) if term in query_weights)
+
+    scores = []
+    for passage in passages:
+        tf = Counter(w for w in passage.words if w in query_weights)
+        score = 0.0
+        for term, freq in tf.items():
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            norm = freq * (k1 + 1) / (freq + k1 * (1 - b + b * len(passage.words) / avg_len))
+            score += query_weights[term] * idf * norm
+        scores.append(score)
+    return scores
+
+
+def select_passages(content: str, query: str, max_tokens: int) -> PreprocessResult:
+    """Deduplicate, strip boilerplate and keep the passages most relevant to ``query``.
+
+    Passages are ranked with BM25 against the query terms and packed into
+    ``max_tokens``; the survivors are emitted in their original order under
+    their source headers so chunking still sees source boundaries.
+    """
+    tokens_before = count_tokens(content)
+    passages = split_passages(content)
+
+    repeats = Counter(' '.join(p.words) for p in passages)
+    cleaned = [p for p in passages if not _is_boilerplate(p, repeats)]
+    boilerplate_removed = len(passages) - len(cleaned)
+
+    unique = remove_near_duplicates(cleaned)
+    duplicates_removed = len(cleaned) - len(unique)
+
+    query_weights = {term: 0.3 for term in _PROFILE_TERMS}
+    query_weights.update({term: 1.0 for term in _words(query) if term not in _STOPWORDS})
+    scores = bm25_scores(unique, query_weights)
+
+    selected, used = [], 0
+    for score, passage in sorted(zip(scores, unique), key=lambda sp: (-sp[0], sp[1].position)):
+        tokens = count_tokens(passage.text)
+        if used + tokens > max_tokens:
+            continue
+        selected.append(passage)
+        used += tokens
+
+    sections: List[str] = []
+    current_source = object()
+    for passage in sorted(selected, key=lambda p: p.position):
+        if passage.source != current_source:
+            current_source = passage.source
+            sections.append(f"Content from {passage.source}:" if passage.source else '')
+        sections.append(passage.text)
+    result = '\n\n'.join(sections).strip()
+    # Keep the header glued to its first passage, as TavilySearcher formats it
+    result = re.sub(r'(Content from \S+:)\n\n', r'\1\n', result)
+
+    return PreprocessResult(
+        content=result,
+        tokens_before=tokens_before,
+        tokens_after=count_tokens(result),
+        duplicates_removed=duplicates_removed,
+        boilerplate_removed=boilerplate_removed,
+    )
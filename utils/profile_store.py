@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from models.profile_models import PersonProfile
+
+
+def content_fingerprint(content: str) -> str:
+    """Hash of a source's text, insensitive to whitespace-only changes."""
+    return hashlib.sha256(' '.join(content.split()).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class SourceRecord:
+    """One data source behind a stored profile and what was extracted from it."""
+    source: str
+    urls: List[str]
+    content_hash: str
+    fetched_at: float
+    profile: PersonProfile
+
+
+class ProfileStore:
+    """SQLite store of merged profiles and the per-source extractions behind them.
+
+    Keeping each source's extraction alongside its fingerprint lets a refresh
+    re-extract only sources whose content changed, and drop sources that no
+    longer turn up, without rebuilding the rest of the profile.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS profiles (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                url TEXT,
+                profile TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sources (
+                profile_key TEXT NOT NULL REFERENCES profiles(key) ON DELETE CASCADE,
+                source TEXT NOT NULL,
+                urls TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                profile TEXT NOT NULL,
+                PRIMARY KEY (profile_key, source)
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def key(query: str, url: Optional[str] = None) -> str:
+        raw = f"{' '.join(query.lower().split())}|{(url or '').strip().lower()}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[PersonProfile]:
+        with self._lock:
+            row = self._conn.execute("SELECT profile FROM profiles WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return PersonProfile.model_validate_json(row[0])
+
+    def iter_profiles(self) -> Iterator[Tuple[str, PersonProfile]]:
+        """Every stored ``(key, profile)``, e.g. for ``TimelineIndex.from_profiles``."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, profile FROM profiles").fetchall()
+        for key, profile in rows:
+            yield key, PersonProfile.model_validate_json(profile)
+
+    def sources(self, key: str) -> Dict[str, SourceRecord]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, urls, content_hash, fetched_at, profile FROM sources WHERE profile_key = ?",
+                (key,)
+            ).fetchall()
+        return {
+            source: SourceRecord(source, json.loads(urls), content_hash, fetched_at,
+                                 PersonProfile.model_validate_json(profile))
+            for source, urls, content_hash, fetched_at, profile in rows
+        }
+
+    def save(self, key: str, query: str, url: Optional[str], profile: PersonProfile,
+             sources: Dict[str, SourceRecord], updated_at: float):
+        """Replace the stored profile and its source set; sources not in ``sources`` are retired."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+                (key, query, url, profile.model_dump_json(), updated_at)
+            )
+            self._conn.execute("DELETE FROM sources WHERE profile_key = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO sources VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, r.source, json.dumps(r.urls), r.content_hash, r.fetched_at, r.profile.model_dump_json())
+                 for r in sources.values()]
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM profiles WHERE key = ?", (key,))
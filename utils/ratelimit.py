@@ -0,0 +1,244 @@
+"""Process-wide rate limiting for the OpenAI and Tavily APIs.
+
+Every call to a rate-limited API goes through the shared ``RateLimiter`` for
+that service (see ``limiter``). Callers wait on token buckets for requests
+and tokens. The buckets are corrected from the rate-limit headers on each
+response, and throttled or transiently failed calls are retried with
+exponential backoff and full jitter. Waiting callers are served by priority
+lane, so interactive lookups go ahead of batch work:
+
+    with ratelimit.priority(ratelimit.BATCH):
+        pipeline.run(name, url)
+
+The lane is a context variable, so it follows work handed to thread pools
+through ``metrics.submit``.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, Type
+import heapq
+import itertools
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+import openai
+import requests
+
+from utils import metrics
+
+INTERACTIVE = 0
+BATCH = 10
+
+# Requests and tokens per minute assumed until the API reports its own limits
+DEFAULT_LIMITS: Dict[str, Tuple[int, Optional[int]]] = {
+    'openai': (500, 150_000),
+    'tavily': (100, None),
+}
+
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+RETRY_ERRORS: Tuple[Type[BaseException], ...] = (
+    openai.APIConnectionError,
+    requests.ConnectionError,
+    requests.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+_priority: ContextVar[int] = ContextVar('profiler_priority', default=INTERACTIVE)
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Run rate-limited calls in this context in the given lane; lower goes first."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from ``"20ms"``, ``"6m0s"`` or a bare number, as used in rate-limit headers."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    try:
+        return int(float(headers[name]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+class TokenBucket:
+    """Continuously refilling bucket; not thread-safe on its own."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, limit: Optional[int], remaining: Optional[int], now: float):
+        """Adopt the server's view of the limit and of what is left in this window."""
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+            self.rate = limit / 60
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """Token-bucket limiter with priority lanes and retrying calls for one API."""
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: Optional[int] = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._tickets = itertools.count()
+        self._paused_until = 0.0
+
+    def _delay(self, tokens: int, now: float) -> float:
+        delay = max(self._paused_until - now, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.wait_time(tokens, now))
+        return delay
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request and ``tokens`` tokens are available to this caller."""
+        lane = _priority.get()
+        ticket = (lane, next(self._tickets))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = None
+                    # Only the first caller in line may take capacity, so lanes and order hold
+                    if self._waiting[0] == ticket:
+                        timeout = self._delay(tokens, now)
+                        if timeout <= 0:
+                            self.requests.take(1, now)
+                            if self.tokens is not None and tokens:
+                                self.tokens.take(tokens, now)
+                            break
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+        metrics.observe('ratelimit_wait_seconds', time.monotonic() - start, limiter=self.name, lane=lane)
+
+    def pause(self, seconds: float):
+        """Hold every caller for ``seconds``, e.g. after the server answered 429."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def observe(self, headers: Mapping[str, str], status: Optional[int] = None):
+        """Correct the buckets from a response's rate-limit headers."""
+        now = time.monotonic()
+        with self._cond:
+            self.requests.sync(_header_int(headers, 'x-ratelimit-limit-requests'),
+                               _header_int(headers, 'x-ratelimit-remaining-requests'), now)
+            if self.tokens is not None:
+                self.tokens.sync(_header_int(headers, 'x-ratelimit-limit-tokens'),
+                                 _header_int(headers, 'x-ratelimit-remaining-tokens'), now)
+        if status == 429:
+            wait = (parse_duration(headers.get('retry-after'))
+                    or parse_duration(headers.get('x-ratelimit-reset-requests'))
+                    or parse_duration(headers.get('x-ratelimit-reset-tokens'))
+                    or self.base_delay)
+            self.pause(min(wait, self.max_delay))
+
+    def observe_httpx(self, response):
+        """``httpx`` response event hook."""
+        self.observe(response.headers, response.status_code)
+
+    def observe_requests(self, response, *args, **kwargs):
+        """``requests`` response hook."""
+        self.observe(response.headers, response.status_code)
+
+    def _retryable(self, error: BaseException, retry_on: Tuple[Type[BaseException], ...]) -> bool:
+        while error is not None:
+            if isinstance(error, RETRY_ERRORS + retry_on) or _status_code(error) in RETRY_STATUSES:
+                return True
+            error = error.__cause__
+        return False
+
+    def call(self, fn: Callable[..., Any], *args, tokens: int = 0,
+             retry_on: Tuple[Type[BaseException], ...] = (), **kwargs) -> Any:
+        """Call ``fn`` within the limits, retrying throttled and transient failures."""
+        for attempt in itertools.count():
+            self.acquire(tokens)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._retryable(e, retry_on):
+                    raise
+                # Full jitter keeps retrying callers from stampeding in lockstep
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                metrics.incr('ratelimit_retries', limiter=self.name)
+                logging.info(f"Retrying {self.name} call in {delay:.1f}s after: {str(e)}")
+                time.sleep(delay)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(name: str) -> RateLimiter:
+    """The process-wide limiter for ``name``.
+
+    Initial limits come from ``PROFILER_<NAME>_RPM`` and ``PROFILER_<NAME>_TPM``
+    and fall back to ``DEFAULT_LIMITS``.
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            rpm, tpm = DEFAULT_LIMITS.get(name, (60, None))
+            rpm = int(os.getenv(f'PROFILER_{name.upper()}_RPM', rpm))
+            tpm = os.getenv(f'PROFILER_{name.upper()}_TPM', tpm)
+            _limiters[name] = RateLimiter(name, rpm, int(tpm) if tpm else None)
+        return _limiters[name]
@@ -1,57 +1,177 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, Tag
+from typing import Dict, Any, Optional
+from utils.http_cache import HttpCache
+from utils.structured import parse_hcard, parse_json_ld
+from utils import metrics
 import logging
 
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+TEXT_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+SOCIAL_PATTERNS = ['facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com']
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+class UnsupportedContentError(Exception):
+    """Raised when a URL does not serve an HTML document."""
+
 class WebScraper:
-    def __init__(self):
+    def __init__(self, cache: Optional[HttpCache] = None, pool_size: int = 10,
+                 max_bytes: int = 2 * 1024 * 1024, timeout: float = 10):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+
+        # Keep-alive session shared across threads; pool_size bounds connections per host
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _read_body(self, response: requests.Response) -> str:
+        """Stream the body, stopping at ``max_bytes``."""
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            body.extend(chunk)
+            if len(body) >= self.max_bytes:
+                logging.info(f"Truncated {response.url} at {self.max_bytes} bytes")
+                metrics.incr('http_truncated')
+                del body[self.max_bytes:]
+                break
+        metrics.observe('http_bytes_fetched', len(body))
+
+        content_type = response.headers.get('Content-Type', '')
+        encoding = response.encoding if 'charset' in content_type.lower() else 'utf-8'
+        return body.decode(encoding or 'utf-8', errors='replace')
+
+    def fetch(self, url: str) -> str:
+        """Return the page body, served from the cache when it is fresh or unchanged."""
+        cached = self.cache.get(url) if self.cache else None
+        if cached and cached.is_fresh(self.cache.ttl):
+            metrics.incr('http_cache', result='hit')
+            return cached.body
+
+        headers = {}
+        if cached:
+            # Stale entry: ask the server whether it has changed
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if cached and response.status_code == 304:
+                metrics.incr('http_cache', result='revalidated')
+                self.cache.touch(url)
+                return cached.body
+            response.raise_for_status()
+
+            # Reject binaries and documents before downloading them
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                raise UnsupportedContentError(f"Unsupported content type {content_type!r}")
+
+            body = self._read_body(response)
+
+        if self.cache:
+            metrics.incr('http_cache', result='miss')
+            self.cache.put(
+                url, body,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return body
+
+    def parse(self, html: str, url: str) -> Dict[str, Any]:
+        """Extract text, meta tags, title, social links and structured data in a single pass over the document."""
+        soup = BeautifulSoup(html, HTML_PARSER)
+
+        text_content = []
+        meta_description = ""
+        meta_keywords = ""
+        title = ''
+        social_links = {}
+        structured = {'json_ld': [], 'opengraph': {}, 'hcards': []}
+
+        def add_link(href: str):
+            href = href.lower()
+            for pattern in SOCIAL_PATTERNS:
+                if pattern in href:
+                    social_links[pattern.split('.')[0]] = href
+
+        stack = list(reversed(soup.contents))
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, Tag):
+                continue
+            name = node.name
+
+            # Nested h-cards (e.g. an h-card p-org) are properties of the outer card
+            if 'h-card' in (node.get('class') or ()) and node.find_parent(class_='h-card') is None:
+                structured['hcards'].append(parse_hcard(node))
+            if name in TEXT_TAGS:
+                # Take the whole subtree's text once, so nested li/p are not duplicated
+                for nested in node.find_all(list(SKIP_TAGS)):
+                    if nested.name == 'script' and (nested.get('type') or '').lower() == 'application/ld+json':
+                        structured['json_ld'].extend(parse_json_ld(nested.get_text()))
+                    nested.decompose()
+                # Separate nested blocks so "<h3>Title</h3><p>Desc</p>" does not become "TitleDesc"
+                text = node.get_text(' ', strip=True)
+                if text:
+                    text_content.append(text)
+                for link in node.find_all('a', href=True):
+                    add_link(link['href'])
+                for card in node.find_all(class_='h-card'):
+                    if card.find_parent(class_='h-card') is None:
+                        structured['hcards'].append(parse_hcard(card))
+                continue
+
+            if name == 'script' and (node.get('type') or '').lower() == 'application/ld+json':
+                structured['json_ld'].extend(parse_json_ld(node.get_text()))
+                continue
+            if name in SKIP_TAGS:
+                continue
+            if name == 'meta':
+                meta_name = (node.get('name') or '').lower()
+                meta_property = (node.get('property') or '').lower()
+                if meta_name == 'description' and not meta_description:
+                    meta_description = node.get('content', '')
+                elif meta_name == 'keywords' and not meta_keywords:
+                    meta_keywords = node.get('content', '')
+                elif meta_property.startswith(('og:', 'profile:')) and node.get('content'):
+                    structured['opengraph'].setdefault(meta_property, node['content'].strip())
+            elif name == 'title' and not title:
+                title = str(node.string or '')
+            elif name == 'a' and node.get('href'):
+                add_link(node['href'])
+
+            stack.extend(reversed(node.contents))
+
+        return {
+            'text_content': ' '.join(text_content),
+            'meta_description': meta_description,
+            'meta_keywords': meta_keywords,
+            'social_links': social_links,
+            'title': title,
+            'structured_data': structured,
+            'url': url
+        }
 
     def scrape_website(self, url: str) -> Dict[str, Any]:
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract text content
-            text_content = []
-            for tag in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']):
-                if tag.text.strip():
-                    text_content.append(tag.text.strip())
-            
-            # Extract meta information
-            meta_description = ""
-            meta_keywords = ""
-            
-            meta_desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc_tag:
-                meta_description = meta_desc_tag.get('content', '')
-                
-            meta_keywords_tag = soup.find('meta', attrs={'name': 'keywords'})
-            if meta_keywords_tag:
-                meta_keywords = meta_keywords_tag.get('content', '')
-            
-            # Extract social media links
-            social_links = {}
-            social_patterns = ['facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com']
-            for link in soup.find_all('a', href=True):
-                href = link['href'].lower()
-                for pattern in social_patterns:
-                    if pattern in href:
-                        social_links[pattern.split('.')[0]] = href
-            
-            return {
-                'text_content': ' '.join(text_content),
-                'meta_description': meta_description,
-                'meta_keywords': meta_keywords,
-                'social_links': social_links,
-                'title': soup.title.string if soup.title else '',
-                'url': url
-            }
-            
+            html = self.fetch(url)
+            return self.parse(html, url)
+
         except Exception as e:
             logging.error(f"Error scraping website {url}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
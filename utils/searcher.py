@@ -1,46 +1,94 @@
 from tavily import TavilyClient
-from typing import List, Dict, Any
+from tavily.errors import UsageLimitExceededError, TimeoutError as TavilyTimeoutError
+from typing import List, Dict, Any, Optional
+from utils.cache import TTLCache, SingleFlight
+from utils.ratelimit import RateLimiter
+from utils import metrics, ratelimit
 import logging
 
 class TavilySearcher:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_ttl: float = 6 * 3600, cache_size: int = 1024,
+                 search_depth: str = "advanced", max_results: int = 5,
+                 limiter: Optional[RateLimiter] = None):
         self.client = TavilyClient(api_key=api_key)
+        # Shared with every other searcher in the process
+        self.limiter = limiter or ratelimit.limiter('tavily')
+        self.client.session.hooks['response'].append(self.limiter.observe_requests)
+        self.search_depth = search_depth
+        self.max_results = max_results
+        self.cache = TTLCache(ttl=cache_ttl, max_entries=cache_size)
+        self.inflight = SingleFlight()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Cache hit, miss and coalesced-request counters."""
+        return {
+            'hits': self.cache.hits,
+            'misses': self.cache.misses,
+            'coalesced': self.inflight.coalesced,
+        }
+
+    def _cache_key(self, query: str) -> tuple:
+        normalized = ' '.join(query.lower().split())
+        return (normalized, self.search_depth, self.max_results)
+
+    def _fetch(self, key: tuple, query: str) -> Dict[str, Any]:
+        # Perform search with topic extraction
+        search_result = self.limiter.call(
+            self.client.search,
+            retry_on=(UsageLimitExceededError, TavilyTimeoutError),
+            query=query,
+            search_depth=self.search_depth,
+            include_answer=True,
+            include_raw_content=True,
+            max_results=self.max_results
+        )
+
+        # Extract and combine content
+        combined_content = ""
+        urls = []
+
+        if search_result.get('answer'):
+            combined_content += f"Summary: {search_result['answer']}\n\n"
+
+        for result in search_result.get('results', []):
+            urls.append(result.get('url', ''))
+            if result.get('raw_content'):
+                combined_content += f"\nContent from {result['url']}:\n{result['raw_content']}\n"
+            elif result.get('content'):
+                combined_content += f"\nContent from {result['url']}:\n{result['content']}\n"
+
+        data = {
+            'content': combined_content,
+            'urls': urls,
+            'search_results': search_result
+        }
+        self.cache.set(key, data)
+        return data
 
     def search(self, query: str) -> Dict[str, Any]:
         try:
-            # Perform search with topic extraction
-            search_result = self.client.search(
-                query=query,
-                search_depth="advanced",
-                include_answer=True,
-                include_raw_content=True,
-                max_results=5
-            )
-            
-            # Extract and combine content
-            combined_content = ""
-            urls = []
-            
-            if search_result.get('answer'):
-                combined_content += f"Summary: {search_result['answer']}\n\n"
-            
-            for result in search_result.get('results', []):
-                urls.append(result.get('url', ''))
-                if result.get('raw_content'):
-                    combined_content += f"\nContent from {result['url']}:\n{result['raw_content']}\n"
-                elif result.get('content'):
-                    combined_content += f"\nContent from {result['url']}:\n{result['content']}\n"
-            
-            return {
-                'content': combined_content,
-                'urls': urls,
-                'search_results': search_result
-            }
-            
+            key = self._cache_key(query)
+            cached = self.cache.get(key)
+            if cached is not None:
+                metrics.incr('search_cache', result='hit')
+                return cached
+
+            # Concurrent identical queries share a single upstream call
+            led = []
+
+            def fetch():
+                led.append(True)
+                return self._fetch(key, query)
+
+            result = self.inflight.do(key, fetch)
+            metrics.incr('search_cache', result='miss' if led else 'coalesced')
+            return result
+
         except Exception as e:
             logging.error(f"Error in Tavily search: {str(e)}")
             return {
                 'content': '',
                 'urls': [],
                 'search_results': {}
-            }
\ No newline at end of file
+            }
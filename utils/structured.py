@@ -0,0 +1,219 @@
+"""Profile data published as schema.org JSON-LD, OpenGraph or microformats2 h-card.
+
+``WebScraper.parse`` collects the raw blocks; ``profile_from_structured``
+maps the ones describing the person being looked up onto a PersonProfile,
+so the extractor can skip model calls for fields the page already states.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+import json
+import logging
+import re
+
+from bs4 import Tag
+import validators
+
+from models.profile_models import PersonProfile, Education
+from utils.merge import merge_profiles, normalize
+
+_WORD = re.compile(r'\w+')
+
+HCARD_PROPERTIES = (
+    'p-name', 'p-given-name', 'p-family-name', 'p-job-title', 'p-role', 'p-org',
+    'p-locality', 'p-region', 'p-country-name', 'p-note', 'u-url', 'u-email',
+)
+
+
+def parse_json_ld(text: str) -> List[Any]:
+    """Objects in one ``application/ld+json`` script, or nothing if it does not parse."""
+    text = text.strip()
+    if text.startswith('<!--'):
+        text = text[4:].rsplit('-->', 1)[0]
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        logging.info(f"Skipping invalid JSON-LD: {str(e)}")
+        return []
+    return data if isinstance(data, list) else [data]
+
+
+def parse_hcard(node: Tag) -> Dict[str, List[str]]:
+    """Properties of one ``h-card`` element."""
+    card: Dict[str, List[str]] = {}
+    for prop in HCARD_PROPERTIES:
+        for element in node.find_all(class_=prop):
+            if prop.startswith('u-'):
+                value = element.get('href') or element.get('src') or element.get_text()
+            else:
+                value = element.get_text()
+            value = ' '.join(value.split())
+            if value:
+                card.setdefault(prop, []).append(value)
+    if 'p-name' not in card and not card.get('p-given-name'):
+        # Implied name: an h-card with no explicit name is named by its text
+        text = ' '.join(node.get_text().split())
+        if text and len(text) < 100:
+            card['p-name'] = [text]
+    return card
+
+
+def _types(node: Dict[str, Any]) -> List[str]:
+    types = node.get('@type') or []
+    return [str(t).rsplit('/', 1)[-1] for t in (types if isinstance(types, list) else [types])]
+
+
+def _top_level(value: Any) -> Iterator[Dict[str, Any]]:
+    """JSON-LD nodes a page states directly: script items and @graph members.
+
+    Nodes nested under other properties (author, creator, knows, colleague
+    and so on) describe someone related to the page, not its subject.
+    """
+    if isinstance(value, list):
+        for item in value:
+            yield from _top_level(item)
+    elif isinstance(value, dict):
+        yield value
+        if '@graph' in value:
+            yield from _top_level(value['@graph'])
+
+
+def _main_entities(nodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """People a ProfilePage names as its subject, with ``{"@id": ...}`` references resolved."""
+    by_id = {node['@id']: node for node in nodes if isinstance(node.get('@id'), str)}
+    subjects = []
+    for node in nodes:
+        if 'ProfilePage' not in _types(node):
+            continue
+        entities = node.get('mainEntity')
+        for entity in entities if isinstance(entities, list) else [entities]:
+            if isinstance(entity, dict) and '@type' not in entity:
+                entity = by_id.get(entity.get('@id'), entity)
+            if isinstance(entity, dict) and 'Person' in _types(entity):
+                subjects.append(entity)
+    return subjects
+
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('@value')
+    if value is None:
+        return None
+    return ' '.join(str(value).split()) or None
+
+
+def _texts(value: Any) -> List[str]:
+    items = value if isinstance(value, list) else [value]
+    return [text for text in (_text(item) for item in items) if text]
+
+
+def _location(value: Any) -> Optional[str]:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        if 'address' in value:
+            return _location(value['address'])
+        parts = [_text(value.get(key)) for key in ('addressLocality', 'addressRegion', 'addressCountry')]
+        return ', '.join(p for p in parts if p) or _text(value)
+    return _text(value)
+
+
+def _social(urls: List[str]) -> Dict[str, str]:
+    profiles = {}
+    for url in urls:
+        host = urlsplit(url).netloc.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        if host:
+            profiles.setdefault(host.split('.')[0], url)
+    return profiles
+
+
+def _tokens(text: Optional[str]) -> set:
+    return set(_WORD.findall((text or '').casefold()))
+
+
+def _name_matches(name: Optional[str], query: Optional[str]) -> bool:
+    """Whether ``name`` plausibly refers to the person in ``query``; URL queries match anything."""
+    if not query or validators.url(query):
+        return True
+    name_tokens, query_tokens = _tokens(name), _tokens(query)
+    return bool(name_tokens) and (name_tokens <= query_tokens or query_tokens <= name_tokens)
+
+
+def _from_json_ld(node: Dict[str, Any]) -> PersonProfile:
+    same_as = [url for url in _texts(node.get('sameAs')) if validators.url(url)]
+    return PersonProfile(
+        full_name=_text(node.get('name')) or ' '.join(
+            _texts(node.get('givenName')) + _texts(node.get('familyName'))) or None,
+        current_role=_text(node.get('jobTitle')),
+        company=_text(node.get('worksFor')),
+        location=_location(node.get('homeLocation') or node.get('address')),
+        education=[Education(institution=name) for name in _texts(node.get('alumniOf'))],
+        skills=_texts(node.get('knowsAbout')),
+        languages=_texts(node.get('knowsLanguage')),
+        achievements=_texts(node.get('award')),
+        organizations=_texts(node.get('memberOf')),
+        social_profiles=_social(same_as),
+        websites=[url for url in _texts(node.get('url')) if validators.url(url)],
+    )
+
+
+def _from_hcard(card: Dict[str, List[str]]) -> PersonProfile:
+    name = (card.get('p-name') or [' '.join(card.get('p-given-name', []) + card.get('p-family-name', []))])[0]
+    location = ', '.join(card[key][0] for key in ('p-locality', 'p-region', 'p-country-name') if key in card)
+    urls = [url for url in card.get('u-url', []) if validators.url(url)]
+    return PersonProfile(
+        full_name=name or None,
+        current_role=(card.get('p-job-title') or card.get('p-role') or [None])[0],
+        company=(card.get('p-org') or [None])[0],
+        location=location or None,
+        websites=urls[:1],
+        social_profiles=_social(urls[1:]),
+    )
+
+
+def _from_opengraph(og: Dict[str, str]) -> Optional[PersonProfile]:
+    # Other og:types describe the page, not a person
+    if og.get('og:type', '').lower() != 'profile':
+        return None
+    name = ' '.join(filter(None, (og.get('profile:first_name'), og.get('profile:last_name'))))
+    return PersonProfile(
+        full_name=name or og.get('og:title') or None,
+        websites=[og['og:url']] if validators.url(og.get('og:url') or '') else [],
+    )
+
+
+def profile_from_structured(data: Dict[str, Any], query: Optional[str] = None) -> Optional[PersonProfile]:
+    """Map a page's structured data onto a PersonProfile, or None if none of it describes ``query``.
+
+    JSON-LD people are taken from a ProfilePage's mainEntity if there is
+    one, otherwise from top-level Person nodes; people nested under an
+    article's author or a person's colleagues never are. With a name query,
+    only people whose name matches it are used. JSON-LD takes precedence
+    over h-card, which takes precedence over OpenGraph.
+    """
+    nodes = list(_top_level(data.get('json_ld') or []))
+    subjects = _main_entities(nodes)
+    people = [node for node in nodes if 'Person' in _types(node)]
+
+    profiles = []
+    for node in subjects or people:
+        profile = _from_json_ld(node)
+        if profile.full_name and _name_matches(profile.full_name, query):
+            profiles.append(profile)
+    for card in data.get('hcards') or []:
+        profile = _from_hcard(card)
+        if profile.full_name and _name_matches(profile.full_name, query):
+            profiles.append(profile)
+    profile = _from_opengraph(data.get('opengraph') or {})
+    if profile is not None and profile.full_name and _name_matches(profile.full_name, query):
+        profiles.append(profile)
+
+    if not profiles:
+        return None
+    if len({normalize(p.full_name) for p in profiles}) > 1 and (not query or validators.url(query)):
+        # Several different people and nothing to choose between them by
+        return None
+    return merge_profiles(profiles)
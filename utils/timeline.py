@@ -0,0 +1,83 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from utils.dates import parse_date, period_end
+
+# PersonProfile fields holding dated events
+EVENT_FIELDS = ('key_events', 'recent_events', 'upcoming_events', 'speaking_engagements')
+
+
+class TimelineEntry(NamedTuple):
+    date: date
+    precision: str
+    category: str
+    event: Any
+    owner: Optional[str] = None
+
+
+def _bound(value: Union[date, str], end: bool) -> date:
+    if isinstance(value, date):
+        return value
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Unrecognized date: {value!r}")
+    # "2023" as an upper bound means the end of 2023
+    return period_end(*parsed) if end else parsed[0]
+
+
+class TimelineIndex:
+    """Dated events from one or many profiles, kept in date order.
+
+    Range and recency queries are binary searches over the sorted dates;
+    each owner also has its own sorted list, so per-owner queries do not
+    scan other owners' events. Imprecise dates ("2023", "Q3 2023") sit at
+    the start of their period.
+    """
+
+    def __init__(self, entries: Iterable[TimelineEntry] = ()):
+        self._entries: List[TimelineEntry] = sorted(entries, key=lambda e: e.date)
+        self._dates: List[date] = [e.date for e in self._entries]
+        self._owners: Dict[Optional[str], Tuple[List[date], List[TimelineEntry]]] = {}
+        for entry in self._entries:
+            dates, entries = self._owners.setdefault(entry.owner, ([], []))
+            dates.append(entry.date)
+            entries.append(entry)
+
+    @staticmethod
+    def entries_for(profile, owner: Optional[str] = None) -> Iterable[TimelineEntry]:
+        for category in EVENT_FIELDS:
+            for event in getattr(profile, category, None) or []:
+                sort_date = getattr(event, 'sort_date', None)
+                if sort_date is not None:
+                    yield TimelineEntry(sort_date, event.date_precision, category, event, owner)
+
+    @classmethod
+    def from_profile(cls, profile, owner: Optional[str] = None) -> 'TimelineIndex':
+        return cls(cls.entries_for(profile, owner))
+
+    @classmethod
+    def from_profiles(cls, profiles: Iterable[Tuple[str, Any]]) -> 'TimelineIndex':
+        """Index ``(owner, profile)`` pairs, e.g. ``ProfileStore.iter_profiles()``."""
+        return cls(entry for owner, profile in profiles for entry in cls.entries_for(profile, owner))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: TimelineEntry):
+        for dates, entries in (self._dates, self._entries), self._owners.setdefault(entry.owner, ([], [])):
+            i = bisect_right(dates, entry.date)
+            dates.insert(i, entry.date)
+            entries.insert(i, entry)
+
+    def between(self, start: Union[date, str], end: Union[date, str]) -> List[TimelineEntry]:
+        """Events dated from ``start`` through ``end`` inclusive, oldest first."""
+        lo = bisect_left(self._dates, _bound(start, end=False))
+        hi = bisect_right(self._dates, _bound(end, end=True))
+        return self._entries[lo:hi]
+
+    def most_recent(self, as_of: Optional[date] = None, owner: Optional[str] = None) -> Optional[TimelineEntry]:
+        """Latest event on or before ``as_of`` (default today), optionally for one owner."""
+        dates, entries = (self._dates, self._entries) if owner is None else self._owners.get(owner, ([], []))
+        i = bisect_right(dates, as_of or date.today())
+        return entries[i - 1] if i else None